@@ -2,16 +2,26 @@ from django.contrib import admin
 
 from .models import (
     HNBatch,
+    HNBatchStory,
+    HNItem,
     HNOverviewArticle,
     HNStory,
     HNStoryContent,
     HNStorySummary,
+    HNSyncState,
     Job,
+    ReaderProfile,
+    SummaryClaim,
 )
 
 admin.site.register(HNBatch)
 admin.site.register(HNStory)
+admin.site.register(HNBatchStory)
 admin.site.register(HNStoryContent)
 admin.site.register(HNStorySummary)
 admin.site.register(HNOverviewArticle)
+admin.site.register(HNItem)
+admin.site.register(HNSyncState)
 admin.site.register(Job)
+admin.site.register(ReaderProfile)
+admin.site.register(SummaryClaim)
@@ -0,0 +1,50 @@
+"""Async variants of the polling and batch-read endpoints.
+
+These use Django's async ORM so that, under an ASGI server, a poller waiting
+on the database does not pin a worker thread. The DRF views in `views.py`
+serve the same payloads for WSGI deployments.
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import HNBatch, Job
+from .serializers import aserialize_batch, serialize_job
+from .services.profiles import atouch_profile
+
+
+def _json(data: dict, status: int = 200) -> JsonResponse:
+    # DRF's encoder, not Django's: it keeps microseconds in datetimes.
+    return JsonResponse(data, status=status, encoder=JSONEncoder)
+
+
+def _not_found(model) -> JsonResponse:
+    # The body DRF renders for get_object_or_404's Http404.
+    return _json({"detail": f"No {model._meta.object_name} matches the given query."}, status=404)
+
+
+@require_GET
+async def get_job(request, job_id: int):
+    job = await Job.objects.select_related("batch").filter(id=job_id).afirst()
+    if job is None:
+        return _not_found(Job)
+    return _json(serialize_job(job))
+
+
+@require_GET
+async def get_latest_batch(request):
+    batch = await HNBatch.objects.order_by("-number").afirst()
+    if not batch:
+        return _json({"error": "no batches yet"}, status=404)
+    bio_hash = request.GET.get("bio_hash")
+    if bio_hash:
+        await atouch_profile(bio_hash)
+    return _json(await aserialize_batch(batch, bio_hash))
+
+
+@require_GET
+async def get_batch(request, number: int):
+    batch = await HNBatch.objects.filter(number=number).afirst()
+    if batch is None:
+        return _not_found(HNBatch)
+    return _json(await aserialize_batch(batch, request.GET.get("bio_hash")))
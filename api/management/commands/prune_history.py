@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from api.services.retention import get_policy, run_retention
+
+
+class Command(BaseCommand):
+    help = "Prune old batches and jobs, then checkpoint/ANALYZE/VACUUM the SQLite databases."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-batches", type=int, help="Number of most recent batches to keep.")
+        parser.add_argument("--job-days", type=int, help="Delete finished jobs older than this many days.")
+        parser.add_argument("--chunk-size", type=int, help="Rows deleted per transaction, for batches and jobs alike.")
+        parser.add_argument("--no-compact", action="store_true", help="Skip WAL checkpoint, ANALYZE and VACUUM.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting.")
+
+    def handle(self, *args, **options):
+        policy = get_policy(
+            keep_batches=options["keep_batches"],
+            job_days=options["job_days"],
+            batch_chunk_size=options["chunk_size"],
+            job_chunk_size=options["chunk_size"],
+        )
+        report = run_retention(policy, compact=not options["no_compact"], dry_run=options["dry_run"])
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        if report["stale_jobs_failed"]:
+            fail_verb = "Would mark" if options["dry_run"] else "Marked"
+            self.stdout.write(f"{fail_verb} {report['stale_jobs_failed']} abandoned queued/running jobs as ERROR")
+        self.stdout.write(
+            f"{verb} {report['batches_deleted']} batches, {report['stories_deleted']} unreferenced stories, "
+            f"{report['jobs_deleted']} jobs and {report['mirror_items_deleted']} mirrored HN items"
+        )
+        for name in report["vacuumed"]:
+            self.stdout.write(f"Vacuumed {name}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.services.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over stories, summaries and overviews."
+
+    def handle(self, *args, **options):
+        counts = rebuild_index()
+        self.stdout.write(f"Indexed {counts['stories']} stories and {counts['overviews']} overviews")
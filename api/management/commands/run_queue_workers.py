@@ -0,0 +1,83 @@
+import logging
+import signal
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+from huey.consumer_options import ConsumerConfig
+
+WORKER_TYPES = ("thread", "process")
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the Huey consumer for one queue with its configured worker pool "
+        "(HUEY_QUEUES in settings), or one consumer process per queue when no queue is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("queues", nargs="*", help=f"queues to consume: {', '.join(settings.HUEY_QUEUES)}")
+        parser.add_argument("--workers", type=int, help="override the queue's worker count")
+        parser.add_argument("--worker-type", choices=WORKER_TYPES, help="override the queue's worker type")
+
+    def handle(self, *args, **options):
+        names = options["queues"] or list(settings.HUEY_QUEUES)
+        unknown = [name for name in names if name not in settings.HUEY_QUEUES]
+        if unknown:
+            raise CommandError(f"unknown queues: {', '.join(unknown)}")
+        if len(names) == 1:
+            self._consume(names[0], options)
+        else:
+            self._spawn(names, options)
+
+    def _consume(self, name: str, options) -> None:
+        queue = settings.HUEY_QUEUES[name]
+        consumer_options = dict(queue["consumer"])
+        if options["workers"]:
+            consumer_options["workers"] = options["workers"]
+        if options["worker_type"]:
+            consumer_options["worker_type"] = options["worker_type"]
+        if consumer_options["worker_type"] not in WORKER_TYPES:
+            raise CommandError(f"{name}: worker_type must be one of {', '.join(WORKER_TYPES)}")
+
+        autodiscover_modules("tasks")
+        config = ConsumerConfig(**consumer_options)
+        config.validate()
+        logger = logging.getLogger("huey")
+        if not logger.handlers:
+            config.setup_logger(logger)
+        logger.info(
+            "Consuming queue %r with %s %s workers", name, config.workers, config.worker_type
+        )
+        queue["huey"].create_consumer(**config.values).run()
+
+    def _spawn(self, names: list[str], options) -> None:
+        # A Huey consumer owns its process (signal handlers, worker pool), so
+        # each queue gets a child process running this command for that queue.
+        # Children get their own session so a terminal Ctrl-C reaches them only
+        # once, through forward(); a second SIGINT would skip graceful shutdown.
+        overrides = []
+        if options["workers"]:
+            overrides += ["--workers", str(options["workers"])]
+        if options["worker_type"]:
+            overrides += ["--worker-type", options["worker_type"]]
+        children = [
+            subprocess.Popen(
+                [sys.executable, sys.argv[0], "run_queue_workers", name, *overrides],
+                start_new_session=True,
+            )
+            for name in names
+        ]
+
+        def forward(signum, frame):
+            for child in children:
+                if child.poll() is None:
+                    child.send_signal(signum)
+
+        signal.signal(signal.SIGINT, forward)
+        signal.signal(signal.SIGTERM, forward)
+        codes = [child.wait() for child in children]
+        if any(codes):
+            raise CommandError(f"queue consumers exited with {codes}")
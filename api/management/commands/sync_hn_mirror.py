@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.services.hn_mirror import sync_mirror
+
+
+class Command(BaseCommand):
+    help = "Refresh the local HN item mirror from the updates, maxitem and topstories feeds."
+
+    def handle(self, *args, **options):
+        report = sync_mirror()
+        self.stdout.write(
+            f"Refreshed {report['refreshed']} items, added {report['new_items']} new stories "
+            f"(max item {report['max_item']})"
+        )
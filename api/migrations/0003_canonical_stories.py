@@ -0,0 +1,96 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def collapse_stories(apps, schema_editor):
+    """Fold per-batch story rows into one canonical row per hn_id.
+
+    The newest row for each hn_id becomes canonical; every old row becomes a
+    batch membership, and summaries/contents of duplicates move onto it.
+    """
+    HNStory = apps.get_model("api", "HNStory")
+    HNStoryContent = apps.get_model("api", "HNStoryContent")
+    HNStorySummary = apps.get_model("api", "HNStorySummary")
+    HNBatchStory = apps.get_model("api", "HNBatchStory")
+
+    canonical: dict[int, HNStory] = {}
+    for story in HNStory.objects.select_related("batch").order_by("-id"):
+        keep = canonical.setdefault(story.hn_id, story)
+        if keep.fetched_at is None:
+            keep.fetched_at = story.batch.created_at
+            keep.save(update_fields=["fetched_at"])
+        HNBatchStory.objects.create(batch_id=story.batch_id, story_id=keep.id, rank=story.rank)
+        if keep.id == story.id:
+            continue
+        HNStorySummary.objects.filter(story_id=story.id).update(story_id=keep.id)
+        if not HNStoryContent.objects.filter(story_id=keep.id).exists():
+            HNStoryContent.objects.filter(story_id=story.id).update(story_id=keep.id)
+        story.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_bio_agnostic_summaries"),
+    ]
+
+    operations = [
+        # 0002 already dropped the (story, bio_hash) index; only the state lags.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterUniqueTogether(
+                    name="hnstorysummary",
+                    unique_together=set(),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="HNBatchStory",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rank", models.PositiveIntegerField()),
+                (
+                    "batch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to="api.hnbatch",
+                    ),
+                ),
+                (
+                    "story",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to="api.hnstory",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("batch", "rank"), ("batch", "story")},
+            },
+        ),
+        migrations.AddField(
+            model_name="hnstory",
+            name="fetched_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(collapse_stories, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="hnstory",
+            name="batch",
+        ),
+        migrations.RemoveField(
+            model_name="hnstory",
+            name="rank",
+        ),
+        migrations.AlterField(
+            model_name="hnstory",
+            name="hn_id",
+            field=models.PositiveIntegerField(unique=True),
+        ),
+        migrations.AddField(
+            model_name="hnbatch",
+            name="stories",
+            field=models.ManyToManyField(related_name="batches", through="api.HNBatchStory", to="api.hnstory"),
+        ),
+    ]
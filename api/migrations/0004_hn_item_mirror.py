@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_canonical_stories"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HNItem",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("hn_id", models.PositiveIntegerField(unique=True)),
+                ("type", models.CharField(blank=True, max_length=20)),
+                ("title", models.TextField(blank=True)),
+                ("url", models.TextField(blank=True)),
+                ("score", models.IntegerField(default=0)),
+                ("deleted", models.BooleanField(default=False)),
+                ("synced_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="HNSyncState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("max_item", models.PositiveIntegerField(default=0)),
+                ("top_story_ids", models.JSONField(default=list)),
+                ("top_synced_at", models.DateTimeField(blank=True, null=True)),
+                ("synced_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0004_hn_item_mirror"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="job",
+            name="kind",
+            field=models.CharField(choices=[("FETCH_BATCH", "FETCH_BATCH"), ("ANALYZE_BATCH", "ANALYZE_BATCH"), ("PREWARM", "PREWARM")], max_length=20),
+        ),
+    ]
@@ -0,0 +1,27 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0005_prewarm_job_kind"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReaderProfile",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("bio_hash", models.CharField(max_length=64, unique=True)),
+                ("bio_text", models.TextField()),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_seen_at", models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="kind",
+            field=models.CharField(choices=[("FETCH_BATCH", "FETCH_BATCH"), ("ANALYZE_BATCH", "ANALYZE_BATCH"), ("PREWARM", "PREWARM"), ("OVERVIEW_FANOUT", "OVERVIEW_FANOUT")], max_length=20),
+        ),
+    ]
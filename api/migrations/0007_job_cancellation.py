@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0006_reader_profiles"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="client_id",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="task_id",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="status",
+            field=models.CharField(choices=[("QUEUED", "QUEUED"), ("RUNNING", "RUNNING"), ("COMPLETE", "COMPLETE"), ("ERROR", "ERROR"), ("CANCELLED", "CANCELLED")], default="QUEUED", max_length=20),
+        ),
+    ]
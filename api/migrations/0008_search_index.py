@@ -0,0 +1,99 @@
+from django.db import migrations
+
+# One FTS5 row per story (rowid = story id) and per overview (rowid = overview id).
+CREATE_TABLES = [
+    """
+    CREATE VIRTUAL TABLE api_story_fts USING fts5(
+        title, content, summary,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE api_overview_fts USING fts5(
+        article, bio_hash UNINDEXED,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+
+# The indexed document for each story. The triggers, the initial population
+# and search.rebuild_index all build on this one statement.
+INSERT_STORY_ROWS = """
+    INSERT INTO api_story_fts (rowid, title, content, summary)
+    SELECT s.id, s.title,
+        COALESCE((SELECT c.extracted_text FROM api_hnstorycontent c WHERE c.story_id = s.id), ''),
+        COALESCE((SELECT group_concat(m.summary_text, ' ') FROM api_hnstorysummary m WHERE m.story_id = s.id), '')
+    FROM api_hnstory s
+"""
+
+INSERT_OVERVIEW_ROWS = """
+    INSERT INTO api_overview_fts (rowid, article, bio_hash)
+    SELECT id, article_text, bio_hash FROM api_hnoverviewarticle
+"""
+
+
+def _reindex_story(story_id: str) -> str:
+    return f"DELETE FROM api_story_fts WHERE rowid = {story_id}; {INSERT_STORY_ROWS} WHERE s.id = {story_id};"
+
+
+def _trigger(name: str, event: str, table: str, body: str) -> str:
+    return f"CREATE TRIGGER {name} AFTER {event} ON {table} BEGIN {body} END"
+
+
+# Stories are indexed from three tables, so any write to one of them rebuilds
+# that story's row. Triggers also cover admin edits and cascading deletes.
+TRIGGERS = {
+    "api_hnstory_fts_ai": ("INSERT", "api_hnstory", _reindex_story("NEW.id")),
+    "api_hnstory_fts_au": ("UPDATE OF title", "api_hnstory", _reindex_story("NEW.id")),
+    "api_hnstory_fts_ad": ("DELETE", "api_hnstory", "DELETE FROM api_story_fts WHERE rowid = OLD.id;"),
+    "api_hnstorycontent_fts_ai": ("INSERT", "api_hnstorycontent", _reindex_story("NEW.story_id")),
+    "api_hnstorycontent_fts_au": (
+        "UPDATE",
+        "api_hnstorycontent",
+        _reindex_story("OLD.story_id") + _reindex_story("NEW.story_id"),
+    ),
+    "api_hnstorycontent_fts_ad": ("DELETE", "api_hnstorycontent", _reindex_story("OLD.story_id")),
+    "api_hnstorysummary_fts_ai": ("INSERT", "api_hnstorysummary", _reindex_story("NEW.story_id")),
+    "api_hnstorysummary_fts_au": (
+        "UPDATE",
+        "api_hnstorysummary",
+        _reindex_story("OLD.story_id") + _reindex_story("NEW.story_id"),
+    ),
+    "api_hnstorysummary_fts_ad": ("DELETE", "api_hnstorysummary", _reindex_story("OLD.story_id")),
+    "api_hnoverviewarticle_fts_ai": (
+        "INSERT",
+        "api_hnoverviewarticle",
+        "INSERT INTO api_overview_fts (rowid, article, bio_hash) VALUES (NEW.id, NEW.article_text, NEW.bio_hash);",
+    ),
+    "api_hnoverviewarticle_fts_au": (
+        "UPDATE",
+        "api_hnoverviewarticle",
+        "DELETE FROM api_overview_fts WHERE rowid = OLD.id;"
+        "INSERT INTO api_overview_fts (rowid, article, bio_hash) VALUES (NEW.id, NEW.article_text, NEW.bio_hash);",
+    ),
+    "api_hnoverviewarticle_fts_ad": (
+        "DELETE",
+        "api_hnoverviewarticle",
+        "DELETE FROM api_overview_fts WHERE rowid = OLD.id;",
+    ),
+}
+
+POPULATE = [INSERT_STORY_ROWS, INSERT_OVERVIEW_ROWS]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0007_job_cancellation"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=CREATE_TABLES
+            + [_trigger(name, event, table, body) for name, (event, table, body) in TRIGGERS.items()]
+            + POPULATE,
+            # Unapplying later migrations can remake a table, which drops its triggers.
+            reverse_sql=[f"DROP TRIGGER IF EXISTS {name}" for name in TRIGGERS]
+            + ["DROP TABLE api_overview_fts", "DROP TABLE api_story_fts"],
+        ),
+    ]
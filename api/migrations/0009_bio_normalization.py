@@ -0,0 +1,64 @@
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _normalized_hash(bio_text: str) -> str:
+    # Frozen copy of api.services.profiles.normalize_bio + hash_bio.
+    text = unicodedata.normalize("NFKC", bio_text).lower()
+    return hashlib.sha256(" ".join(re.findall(r"[^\W_]+", text)).encode("utf-8")).hexdigest()
+
+
+def rehash_bios(apps, schema_editor):
+    """Re-key profiles and their overviews by the normalized bio hash.
+
+    Profiles whose bios normalize to the same text are merged into the most
+    recently seen one; a duplicate overview for the same batch is dropped.
+    """
+    ReaderProfile = apps.get_model("api", "ReaderProfile")
+    HNOverviewArticle = apps.get_model("api", "HNOverviewArticle")
+
+    for profile in ReaderProfile.objects.order_by("-last_seen_at"):
+        new_hash = _normalized_hash(profile.bio_text)
+        if new_hash == profile.bio_hash:
+            continue
+        for overview in HNOverviewArticle.objects.filter(bio_hash=profile.bio_hash):
+            if HNOverviewArticle.objects.filter(batch_id=overview.batch_id, bio_hash=new_hash).exists():
+                overview.delete()
+            else:
+                overview.bio_hash = new_hash
+                overview.save(update_fields=["bio_hash"])
+        if ReaderProfile.objects.filter(bio_hash=new_hash).exists():
+            profile.delete()
+        else:
+            profile.bio_hash = new_hash
+            profile.save(update_fields=["bio_hash"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0008_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="hnoverviewarticle",
+            name="bio_signature",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="hnoverviewarticle",
+            name="reused_from",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="reuses",
+                to="api.hnoverviewarticle",
+            ),
+        ),
+        migrations.RunPython(rehash_bios, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0009_bio_normalization"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="started_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def drop_duplicate_summaries(apps, schema_editor):
+    """Keep the newest summary of each story; concurrent jobs could write two."""
+    HNStorySummary = apps.get_model("api", "HNStorySummary")
+    newest = {}
+    for summary_id, story_id in HNStorySummary.objects.order_by("created_at", "id").values_list("id", "story_id"):
+        newest[story_id] = summary_id
+    HNStorySummary.objects.exclude(id__in=list(newest.values())).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0010_job_started_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_summaries, migrations.RunPython.noop),
+        # AddConstraint would rebuild the table on SQLite, dropping the search
+        # index triggers from 0008; a plain unique index is equivalent.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="hnstorysummary",
+                    constraint=models.UniqueConstraint(fields=["story"], name="api_hnstorysummary_story_unique"),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    "CREATE UNIQUE INDEX api_hnstorysummary_story_unique ON api_hnstorysummary (story_id)",
+                    "DROP INDEX api_hnstorysummary_story_unique",
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SummaryClaim",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("claimed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "batch",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="summary_claim", to="api.hnbatch"
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="summary_claims", to="api.job"
+                    ),
+                ),
+            ],
+        ),
+    ]
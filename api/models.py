@@ -1,23 +1,38 @@
 from django.db import models
+from django.utils import timezone
 
 
 class HNBatch(models.Model):
     number = models.PositiveIntegerField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    stories = models.ManyToManyField("HNStory", through="HNBatchStory", related_name="batches")
 
     def __str__(self) -> str:
         return f"HNBatch #{self.number}"
 
 
 class HNStory(models.Model):
-    batch = models.ForeignKey(HNBatch, on_delete=models.CASCADE, related_name="stories")
-    hn_id = models.PositiveIntegerField()
-    rank = models.PositiveIntegerField()
+    """Canonical copy of an HN story, shared by every batch it appears in."""
+
+    hn_id = models.PositiveIntegerField(unique=True)
     title = models.TextField()
     url = models.URLField()
+    fetched_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class HNBatchStory(models.Model):
+    batch = models.ForeignKey(HNBatch, on_delete=models.CASCADE, related_name="memberships")
+    story = models.ForeignKey(HNStory, on_delete=models.CASCADE, related_name="memberships")
+    rank = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = [("batch", "rank"), ("batch", "story")]
 
     def __str__(self) -> str:
-        return f"{self.rank}. {self.title}"
+        return f"{self.rank}. {self.story_id} in batch {self.batch_id}"
 
 
 class HNStoryContent(models.Model):
@@ -35,6 +50,9 @@ class HNStorySummary(models.Model):
     summary_text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["story"], name="api_hnstorysummary_story_unique")]
+
     def __str__(self) -> str:
         return f"Summary for {self.story_id}"
 
@@ -42,7 +60,11 @@ class HNStorySummary(models.Model):
 class HNOverviewArticle(models.Model):
     batch = models.ForeignKey(HNBatch, on_delete=models.CASCADE, related_name="overviews")
     bio_hash = models.CharField(max_length=64)
+    bio_signature = models.JSONField(null=True, blank=True)
     article_text = models.TextField()
+    reused_from = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="reuses"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -52,16 +74,64 @@ class HNOverviewArticle(models.Model):
         return f"Overview for batch {self.batch_id}"
 
 
+class ReaderProfile(models.Model):
+    """A returning reader's bio, used to precompute overviews for new batches."""
+
+    bio_hash = models.CharField(max_length=64, unique=True)
+    bio_text = models.TextField()
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self) -> str:
+        return f"Reader {self.bio_hash[:12]}"
+
+
+class HNItem(models.Model):
+    """Local mirror of HN item metadata, kept fresh from the updates feed."""
+
+    hn_id = models.PositiveIntegerField(unique=True)
+    type = models.CharField(max_length=20, blank=True)
+    title = models.TextField(blank=True)
+    url = models.TextField(blank=True)
+    score = models.IntegerField(default=0)
+    deleted = models.BooleanField(default=False)
+    synced_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"HN item {self.hn_id}"
+
+
+class HNSyncState(models.Model):
+    """Single row holding the mirror's feed cursors."""
+
+    max_item = models.PositiveIntegerField(default=0)
+    top_story_ids = models.JSONField(default=list)
+    top_synced_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def load(cls) -> "HNSyncState":
+        state, _ = cls.objects.get_or_create(pk=1)
+        return state
+
+    def __str__(self) -> str:
+        return f"HN sync state (max item {self.max_item})"
+
+
 class Job(models.Model):
     class Kind(models.TextChoices):
         FETCH_BATCH = "FETCH_BATCH", "FETCH_BATCH"
         ANALYZE_BATCH = "ANALYZE_BATCH", "ANALYZE_BATCH"
+        PREWARM = "PREWARM", "PREWARM"
+        OVERVIEW_FANOUT = "OVERVIEW_FANOUT", "OVERVIEW_FANOUT"
 
     class Status(models.TextChoices):
         QUEUED = "QUEUED", "QUEUED"
         RUNNING = "RUNNING", "RUNNING"
         COMPLETE = "COMPLETE", "COMPLETE"
         ERROR = "ERROR", "ERROR"
+        CANCELLED = "CANCELLED", "CANCELLED"
 
     kind = models.CharField(max_length=20, choices=Kind.choices)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
@@ -70,8 +140,26 @@ class Job(models.Model):
     message = models.CharField(max_length=255, blank=True)
     error = models.TextField(null=True, blank=True)
     batch = models.ForeignKey(HNBatch, on_delete=models.SET_NULL, null=True, blank=True)
+    client_id = models.CharField(max_length=64, blank=True, db_index=True)
+    task_id = models.CharField(max_length=64, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.COMPLETE, self.Status.ERROR, self.Status.CANCELLED)
+
     def __str__(self) -> str:
         return f"{self.kind} ({self.status})"
+
+
+class SummaryClaim(models.Model):
+    """The job currently generating a batch's missing summaries, one per batch."""
+
+    batch = models.OneToOneField(HNBatch, on_delete=models.CASCADE, related_name="summary_claim")
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="summary_claims")
+    claimed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Summaries of batch {self.batch_id} claimed by job {self.job_id}"
@@ -0,0 +1,156 @@
+"""Plain-dict payloads shared by the sync (DRF) and async views."""
+from __future__ import annotations
+
+from collections import defaultdict
+
+from api.models import HNBatch, HNBatchStory, HNOverviewArticle, HNStorySummary, Job
+
+HEADER_FIELDS = ("batch_number", "created_at")
+SECTION_FIELDS = ("stories", "summaries", "overviews")
+BATCH_LIST_FIELDS = HEADER_FIELDS + SECTION_FIELDS
+
+
+def serialize_job(job: Job) -> dict:
+    """Expects `job.batch` to be loaded (use select_related in async code)."""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "progress_current": job.progress_current,
+        "progress_total": job.progress_total,
+        "message": job.message,
+        "error": job.error,
+        "batch_number": job.batch.number if job.batch else None,
+    }
+
+
+def _batch_querysets(batch: HNBatch, bio_hash: str | None):
+    memberships = batch.memberships.select_related("story__content").order_by("rank")
+    overviews = batch.overviews.defer("bio_signature").order_by("-created_at")
+    if bio_hash:
+        overviews = overviews.filter(bio_hash=bio_hash)
+    summaries = HNStorySummary.objects.filter(story__memberships__batch=batch).order_by("created_at")
+    return memberships, overviews, summaries.values_list("story_id", "summary_text")
+
+
+def build_batch_payload(
+    batch: HNBatch,
+    memberships: list,
+    summary_map: dict[int, str],
+    overview: HNOverviewArticle | None,
+    bio_hash: str | None = None,
+) -> dict:
+    return {
+        "batch_number": batch.number,
+        "created_at": batch.created_at,
+        "bio_hash": bio_hash,
+        "stories": [
+            {
+                "id": m.story.id,
+                "rank": m.rank,
+                "title": m.story.title,
+                "url": m.story.url,
+                "content_error": getattr(getattr(m.story, "content", None), "error", None),
+            }
+            for m in memberships
+        ],
+        "summaries": [
+            {
+                "story_id": m.story_id,
+                "summary_text": summary_map.get(m.story_id),
+            }
+            for m in memberships
+            if m.story_id in summary_map
+        ],
+        "overview": (
+            {
+                "bio_hash": overview.bio_hash,
+                "article_text": overview.article_text,
+                "reused": overview.reused_from_id is not None,
+                "created_at": overview.created_at,
+            }
+            if overview
+            else None
+        ),
+    }
+
+
+def serialize_batch(batch: HNBatch, bio_hash: str | None = None) -> dict:
+    memberships, overviews, summaries = _batch_querysets(batch, bio_hash)
+    return build_batch_payload(
+        batch,
+        list(memberships),
+        dict(summaries),
+        overviews.first(),
+        bio_hash,
+    )
+
+
+async def aserialize_batch(batch: HNBatch, bio_hash: str | None = None) -> dict:
+    memberships, overviews, summaries = _batch_querysets(batch, bio_hash)
+    return build_batch_payload(
+        batch,
+        [m async for m in memberships],
+        {story_id: text async for story_id, text in summaries},
+        await overviews.afirst(),
+        bio_hash,
+    )
+
+
+def serialize_batch_page(
+    batches: list[HNBatch],
+    fields: set[str],
+    bio_hash: str | None = None,
+) -> list[dict]:
+    """Serialize a page of batches with one query per requested section.
+
+    The query count depends only on which sections are requested, never on
+    how many batches are on the page.
+    """
+    batch_ids = [batch.id for batch in batches]
+    memberships: dict[int, list[HNBatchStory]] = defaultdict(list)
+    summary_map: dict[int, str] = {}
+    overviews: dict[int, list[HNOverviewArticle]] = defaultdict(list)
+
+    if fields & {"stories", "summaries"}:
+        rows = (
+            HNBatchStory.objects.filter(batch_id__in=batch_ids)
+            .select_related("story__content")
+            .order_by("batch_id", "rank")
+        )
+        for membership in rows:
+            memberships[membership.batch_id].append(membership)
+
+    if "summaries" in fields:
+        summary_map = dict(
+            HNStorySummary.objects.filter(story__memberships__batch_id__in=batch_ids)
+            .order_by("created_at")
+            .values_list("story_id", "summary_text")
+        )
+
+    if "overviews" in fields:
+        rows = HNOverviewArticle.objects.filter(batch_id__in=batch_ids).defer("bio_signature").order_by("-created_at")
+        if bio_hash:
+            rows = rows.filter(bio_hash=bio_hash)
+        for overview in rows:
+            overviews[overview.batch_id].append(overview)
+
+    page = []
+    for batch in batches:
+        payload = build_batch_payload(batch, memberships[batch.id], summary_map, None, bio_hash)
+        item = {field: payload[field] for field in HEADER_FIELDS if field in fields}
+        if "stories" in fields:
+            item["stories"] = payload["stories"]
+        if "summaries" in fields:
+            item["summaries"] = payload["summaries"]
+        if "overviews" in fields:
+            item["overviews"] = [
+                {
+                    "bio_hash": overview.bio_hash,
+                    "article_text": overview.article_text,
+                    "reused": overview.reused_from_id is not None,
+                    "created_at": overview.created_at,
+                }
+                for overview in overviews[batch.id]
+            ]
+        page.append(item)
+    return page
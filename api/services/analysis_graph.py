@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import asyncio
+import operator
 import os
-from typing import Any, TypedDict
+from pathlib import Path
+from typing import Annotated, Any, Callable, TypedDict
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
 
-from api.models import HNBatch
+from api.models import HNBatchStory
 
 
 class AnalysisInput(TypedDict):
@@ -23,9 +30,14 @@ class StoryPayload(TypedDict):
     error: str | None
 
 
+class StoryTask(TypedDict):
+    story: StoryPayload
+
+
 class AnalysisState(AnalysisInput):
     stories: list[StoryPayload]
-    summaries: list[dict]
+    summaries: Annotated[list[dict], operator.add]
+    errors: Annotated[list[str], operator.add]
     overview_text: str
 
 
@@ -38,9 +50,15 @@ def _get_models() -> tuple[ChatOpenAI, ChatOpenAI]:
 
 
 def _load_stories(batch_number: int) -> list[StoryPayload]:
-    batch = HNBatch.objects.prefetch_related("stories__content").get(number=batch_number)
+    """Stories in the batch that still need a summary (shared stories keep theirs)."""
+    memberships = (
+        HNBatchStory.objects.filter(batch__number=batch_number, story__summaries__isnull=True)
+        .select_related("story__content")
+        .order_by("rank")
+    )
     stories: list[StoryPayload] = []
-    for story in batch.stories.all().order_by("rank"):
+    for membership in memberships:
+        story = membership.story
         content = getattr(story, "content", None)
         stories.append(
             {
@@ -54,11 +72,7 @@ def _load_stories(batch_number: int) -> list[StoryPayload]:
     return stories
 
 
-async def _summarize_story(
-    sem: asyncio.Semaphore,
-    model: ChatOpenAI,
-    payload: StoryPayload,
-) -> dict:
+async def _summarize_story(model: ChatOpenAI, payload: StoryPayload) -> dict:
     if payload["error"] or not payload["text"]:
         return {
             "story_id": payload["id"],
@@ -80,8 +94,7 @@ async def _summarize_story(
             "Summary:"
         )
     )
-    async with sem:
-        response = await model.ainvoke([system, human])
+    response = await model.ainvoke([system, human])
     return {
         "story_id": payload["id"],
         "title": payload["title"],
@@ -90,33 +103,99 @@ async def _summarize_story(
     }
 
 
-async def _summarize_all(state: AnalysisState) -> dict:
-    summary_model, _ = _get_models()
-    concurrency = int(os.environ.get("SUMMARY_CONCURRENCY", "5"))
-    sem = asyncio.Semaphore(concurrency)
-    tasks = [
-        _summarize_story(sem, summary_model, payload)
-        for payload in state["stories"]
-    ]
-    summaries = await asyncio.gather(*tasks)
-    return {"summaries": summaries}
+def checkpoint_thread_id(job_id: int) -> str:
+    return f"summaries-job-{job_id}"
 
 
-def run_summary_analysis(batch_number: int) -> dict[str, Any]:
-    stories = _load_stories(batch_number)
+def delete_checkpoints(job_ids: list[int]) -> None:
+    """Drop saved graph state for jobs that no longer need resuming."""
+    path = Path(settings.LANGGRAPH_CHECKPOINT_DB)
+    if not job_ids or not path.exists():
+        return
+    with SqliteSaver.from_conn_string(str(path)) as saver:
+        for job_id in job_ids:
+            saver.delete_thread(checkpoint_thread_id(job_id))
+
+
+def _build_summary_graph(
+    stories: list[StoryPayload],
+    check_cancelled: Callable[[], None] | None,
+    on_summary: Callable[[dict], None] | None,
+) -> StateGraph:
+    summary_model, _ = _get_models()
 
     def inject_stories(state: AnalysisInput) -> dict:
         return {"stories": stories}
 
+    def fan_out(state: AnalysisState) -> list[Send]:
+        return [Send("summarize_story", {"story": payload}) for payload in state["stories"]]
+
+    async def summarize_story(state: StoryTask) -> dict:
+        # Hooks touch the DB, so they run off the event loop.
+        if check_cancelled:
+            await sync_to_async(check_cancelled)()
+        # A failure is recorded rather than raised: raising would cancel the
+        # sibling tasks and throw away LLM calls that already finished.
+        try:
+            summary = await _summarize_story(summary_model, state["story"])
+            if on_summary:
+                await sync_to_async(on_summary)(summary)
+        except Exception as exc:
+            return {"errors": [f"story {state['story']['id']}: {exc.__class__.__name__}: {exc}"]}
+        return {"summaries": [summary]}
+
     builder = StateGraph(AnalysisState, input_schema=AnalysisInput)
     builder.add_node("inject_stories", inject_stories)
-    builder.add_node("summarize_all", _summarize_all)
+    builder.add_node("summarize_story", summarize_story)
     builder.add_edge(START, "inject_stories")
-    builder.add_edge("inject_stories", "summarize_all")
-    builder.add_edge("summarize_all", END)
-
-    graph = builder.compile()
-    result = asyncio.run(graph.ainvoke({"batch_number": batch_number}))
+    builder.add_conditional_edges("inject_stories", fan_out, ["summarize_story"])
+    builder.add_edge("summarize_story", END)
+    return builder
+
+
+async def _run_checkpointed(builder: StateGraph, batch_number: int, thread_id: str, concurrency: int) -> dict:
+    async with AsyncSqliteSaver.from_conn_string(str(settings.LANGGRAPH_CHECKPOINT_DB)) as saver:
+        graph = builder.compile(checkpointer=saver)
+        config = {"configurable": {"thread_id": thread_id}, "max_concurrency": concurrency}
+        snapshot = await graph.aget_state(config)
+        # A pending next step means an earlier attempt stopped part-way: resume it.
+        # Story tasks that already finished are replayed from the checkpoint.
+        graph_input = None if snapshot.next else {"batch_number": batch_number}
+        result = await graph.ainvoke(graph_input, config)
+        await saver.adelete_thread(thread_id)
+    return result
+
+
+def run_summary_analysis(
+    batch_number: int,
+    concurrency: int | None = None,
+    check_cancelled: Callable[[], None] | None = None,
+    on_summary: Callable[[dict], None] | None = None,
+    thread_id: str | None = None,
+) -> dict[str, Any]:
+    """Summarize the batch's unsummarized stories, one graph task per story.
+
+    `on_summary` is called as each summary completes. A story that fails does
+    not stop the others; once all have finished, RuntimeError reports the
+    failures. With a `thread_id`, the graph is checkpointed to
+    LANGGRAPH_CHECKPOINT_DB and a later call with the same id resumes an
+    interrupted run instead of starting over.
+    """
+    stories = _load_stories(batch_number)
+    if concurrency is None:
+        concurrency = int(os.environ.get("SUMMARY_CONCURRENCY", "5"))
+    builder = _build_summary_graph(stories, check_cancelled, on_summary)
+
+    if thread_id:
+        result = asyncio.run(_run_checkpointed(builder, batch_number, thread_id, concurrency))
+    else:
+        graph = builder.compile()
+        result = asyncio.run(
+            graph.ainvoke({"batch_number": batch_number}, {"max_concurrency": concurrency})
+        )
+    errors = result.get("errors", [])
+    if errors:
+        raise RuntimeError(f"{len(errors)} summaries failed; first: {errors[0]}")
     return {
         "summaries": result.get("summaries", []),
     }
@@ -1,17 +1,79 @@
 from __future__ import annotations
 
+import time
 from typing import Tuple
 
+import httpx
 import trafilatura
+from django.conf import settings
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+USER_AGENT = "Mozilla/5.0 (compatible; lgraph-demo article fetcher)"
+
+
+def download_html(url: str, max_bytes: int | None = None) -> Tuple[bytes | None, bool, str | None]:
+    """Stream at most `max_bytes` of an HTML page.
+
+    Gives up before reading the body when the Content-Type is not HTML or the
+    declared Content-Length is over ARTICLE_MAX_CONTENT_LENGTH, and fails once
+    the download has taken ARTICLE_DEADLINE_SECONDS (the client timeout only
+    bounds each read, so a server trickling bytes could hold it forever).
+    Returns `(body, truncated, error)`; `body` is None when the download was
+    skipped or failed, and `error` says why.
+    """
+    max_bytes = max_bytes or settings.ARTICLE_MAX_BYTES
+    deadline = time.monotonic() + settings.ARTICLE_DEADLINE_SECONDS
+    try:
+        with httpx.Client(
+            timeout=settings.ARTICLE_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        ) as client:
+            with client.stream("GET", url) as resp:
+                if resp.status_code >= 400:
+                    return None, False, f"failed to download article: HTTP {resp.status_code}"
+
+                content_type = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+                if content_type and content_type not in HTML_CONTENT_TYPES:
+                    return None, False, f"skipped: unsupported content type {content_type}"
+
+                length = resp.headers.get("content-length", "")
+                if length.isdigit() and int(length) > settings.ARTICLE_MAX_CONTENT_LENGTH:
+                    return None, False, f"skipped: content length {length} bytes exceeds limit"
+
+                chunks: list[bytes] = []
+                received = 0
+                truncated = False
+                for chunk in resp.iter_bytes():
+                    if time.monotonic() > deadline:
+                        return None, False, (
+                            f"failed to download article: took over {settings.ARTICLE_DEADLINE_SECONDS:g}s"
+                        )
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if received >= max_bytes:
+                        truncated = True
+                        break
+    except httpx.HTTPError as exc:
+        return None, False, f"failed to download article: {exc.__class__.__name__}"
+    except (httpx.InvalidURL, UnicodeError) as exc:
+        # Malformed URLs, e.g. a bad port or an over-long hostname label (IDNA).
+        return None, False, f"failed to download article: invalid URL ({exc.__class__.__name__})"
+
+    return b"".join(chunks)[:max_bytes], truncated, None
 
 
 def extract_article_text(url: str, word_limit: int = 1000) -> Tuple[str, int, str | None]:
-    downloaded = trafilatura.fetch_url(url)
+    downloaded, truncated, error = download_html(url)
+    if error:
+        return "", 0, error
     if not downloaded:
         return "", 0, "failed to download article"
 
     text = trafilatura.extract(downloaded)
     if not text:
+        if truncated:
+            return "", 0, f"failed to extract text (download truncated at {settings.ARTICLE_MAX_BYTES} bytes)"
         return "", 0, "failed to extract text"
 
     words = text.split()
@@ -1,25 +1,64 @@
 from __future__ import annotations
 
+import asyncio
+
 import httpx
+from django.conf import settings
 
-HN_BASE_URL = "https://hacker-news.firebaseio.com/v0"
 
+def _base_url() -> str:
+    return settings.HN_API_BASE_URL.rstrip("/")
 
-def get_top_story_ids() -> list[int]:
-    with httpx.Client(timeout=10.0) as client:
-        resp = client.get(f"{HN_BASE_URL}/topstories.json")
-        resp.raise_for_status()
-        data = resp.json()
-    return [int(item) for item in data]
 
-
-def get_item(item_id: int) -> dict:
-    with httpx.Client(timeout=10.0) as client:
-        resp = client.get(f"{HN_BASE_URL}/item/{item_id}.json")
-        resp.raise_for_status()
-        data = resp.json()
+def _normalize_item(data: dict | None, item_id: int) -> dict:
+    data = data or {}
     return {
         "id": data.get("id", item_id),
+        "type": data.get("type", ""),
         "title": data.get("title", ""),
         "url": data.get("url") or "",
+        "score": data.get("score", 0),
+        "deleted": bool(data.get("deleted") or data.get("dead")),
     }
+
+
+def _get_json(path: str):
+    with httpx.Client(timeout=10.0) as client:
+        resp = client.get(f"{_base_url()}/{path}")
+        resp.raise_for_status()
+        return resp.json()
+
+
+def get_top_story_ids() -> list[int]:
+    return [int(item) for item in _get_json("topstories.json")]
+
+
+def get_max_item() -> int:
+    return int(_get_json("maxitem.json"))
+
+
+def get_updates() -> list[int]:
+    """Ids of items changed recently, per the `/v0/updates.json` feed."""
+    data = _get_json("updates.json") or {}
+    return [int(item) for item in data.get("items", [])]
+
+
+async def _get_items(item_ids: list[int], concurrency: int) -> list[dict]:
+    sem = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=_base_url(), timeout=10.0) as client:
+
+        async def fetch(item_id: int) -> dict:
+            async with sem:
+                resp = await client.get(f"/item/{item_id}.json")
+            resp.raise_for_status()
+            return _normalize_item(resp.json(), item_id)
+
+        return await asyncio.gather(*(fetch(item_id) for item_id in item_ids))
+
+
+def get_items(item_ids: list[int], concurrency: int | None = None) -> list[dict]:
+    """Fetch many items concurrently over one connection pool, preserving order."""
+    if not item_ids:
+        return []
+    return asyncio.run(_get_items(item_ids, concurrency or settings.HN_FETCH_CONCURRENCY))
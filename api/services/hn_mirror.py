@@ -0,0 +1,115 @@
+"""Local mirror of HN item metadata, synced from the Firebase updates feeds."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TypedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import HNItem, HNSyncState
+from api.services.hn import get_items, get_max_item, get_top_story_ids, get_updates
+
+MIRROR_FIELDS = ("type", "title", "url", "score", "deleted", "synced_at")
+
+
+class SyncReport(TypedDict):
+    refreshed: int
+    new_items: int
+    max_item: int
+
+
+def _save_items(items: list[dict]) -> None:
+    now = timezone.now()
+    HNItem.objects.bulk_create(
+        [
+            HNItem(
+                hn_id=item["id"],
+                type=item["type"],
+                title=item["title"],
+                url=item["url"],
+                score=item["score"] or 0,
+                deleted=item["deleted"],
+                synced_at=now,
+            )
+            for item in items
+        ],
+        update_conflicts=True,
+        unique_fields=["hn_id"],
+        update_fields=list(MIRROR_FIELDS),
+    )
+
+
+def _as_item(row: HNItem) -> dict:
+    return {
+        "id": row.hn_id,
+        "type": row.type,
+        "title": row.title,
+        "url": row.url,
+        "score": row.score,
+        "deleted": row.deleted,
+    }
+
+
+def resolve_items(item_ids: list[int]) -> list[dict]:
+    """Return items in the given order, fetching only those missing or stale in the mirror."""
+    fresh_after = timezone.now() - timedelta(seconds=settings.HN_MIRROR_ITEM_MAX_AGE_SECONDS)
+    cached = {
+        row.hn_id: _as_item(row)
+        for row in HNItem.objects.filter(hn_id__in=item_ids, synced_at__gte=fresh_after)
+    }
+    fetched = get_items([item_id for item_id in item_ids if item_id not in cached])
+    _save_items(fetched)
+    cached.update({item["id"]: item for item in fetched})
+    return [cached[item_id] for item_id in item_ids]
+
+
+def top_story_ids() -> list[int]:
+    """Top story ids from the last sync, or straight from the API when that is too old."""
+    state = HNSyncState.load()
+    fresh_after = timezone.now() - timedelta(seconds=settings.HN_MIRROR_TOP_MAX_AGE_SECONDS)
+    if state.top_synced_at and state.top_synced_at >= fresh_after and state.top_story_ids:
+        return list(state.top_story_ids)
+
+    ids = get_top_story_ids()
+    state.top_story_ids = ids
+    state.top_synced_at = timezone.now()
+    state.save(update_fields=["top_story_ids", "top_synced_at"])
+    return ids
+
+
+def sync_mirror() -> SyncReport:
+    """Pull the updates/maxitem/topstories feeds and refresh the mirror in one batch.
+
+    Refreshes mirrored items the updates feed reports as changed, the current
+    top-story candidates, and new stories since the last seen max item
+    (capped at HN_MIRROR_NEW_ITEM_LIMIT; non-story items are not kept).
+    """
+    state = HNSyncState.load()
+    max_item = get_max_item()
+    top_ids = get_top_story_ids()[: settings.HN_TOP_CANDIDATES]
+    updated = set(get_updates())
+
+    known = set(HNItem.objects.filter(hn_id__in=updated | set(top_ids)).values_list("hn_id", flat=True))
+    refresh_ids = (updated & known) | set(top_ids)
+
+    new_ids: list[int] = []
+    if state.max_item:
+        start = max(state.max_item + 1, max_item - settings.HN_MIRROR_NEW_ITEM_LIMIT + 1)
+        new_ids = [item_id for item_id in range(start, max_item + 1) if item_id not in refresh_ids]
+
+    items = get_items(sorted(refresh_ids) + new_ids)
+    refreshed = [item for item in items if item["id"] in refresh_ids]
+    new_stories = [item for item in items if item["id"] not in refresh_ids and item["type"] == "story"]
+
+    now = timezone.now()
+    with transaction.atomic():
+        _save_items(refreshed + new_stories)
+        state.max_item = max_item
+        state.top_story_ids = top_ids
+        state.top_synced_at = now
+        state.synced_at = now
+        state.save()
+
+    return {"refreshed": len(refreshed), "new_items": len(new_stories), "max_item": max_item}
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from api.models import HNBatch, ReaderProfile
+
+
+def normalize_bio(bio_text: str) -> str:
+    """Canonical bio text: NFKC, lower case, words joined by single spaces.
+
+    Punctuation, symbols and whitespace runs all collapse to one space, so
+    cosmetic edits keep the same hash. templates/index.html applies the same
+    steps when it hashes the bio client-side.
+    """
+    text = unicodedata.normalize("NFKC", bio_text).lower()
+    return " ".join(re.findall(r"[^\W_]+", text))
+
+
+def hash_bio(bio_text: str) -> str:
+    return hashlib.sha256(normalize_bio(bio_text).encode("utf-8")).hexdigest()
+
+
+def save_profile(bio_text: str) -> ReaderProfile:
+    profile, _ = ReaderProfile.objects.update_or_create(
+        bio_hash=hash_bio(bio_text),
+        defaults={"bio_text": bio_text, "is_active": True, "last_seen_at": timezone.now()},
+    )
+    return profile
+
+
+def touch_profile(hash_value: str) -> None:
+    ReaderProfile.objects.filter(bio_hash=hash_value).update(last_seen_at=timezone.now())
+
+
+async def atouch_profile(hash_value: str) -> None:
+    await ReaderProfile.objects.filter(bio_hash=hash_value).aupdate(last_seen_at=timezone.now())
+
+
+def fanout_profiles(batch: HNBatch) -> QuerySet:
+    """Active profiles without an overview for the batch, most recently seen first."""
+    active_after = timezone.now() - timedelta(days=settings.PROFILE_ACTIVE_DAYS)
+    return (
+        ReaderProfile.objects.filter(is_active=True, last_seen_at__gte=active_after)
+        .exclude(bio_hash__in=batch.overviews.values("bio_hash"))
+        .order_by("-last_seen_at")[: settings.PROFILE_FANOUT_LIMIT]
+    )
@@ -0,0 +1,81 @@
+"""Depth and wait-time metrics for the Huey queues.
+
+Depth comes from each queue's storage. Wait time is how long jobs sat
+queued before a worker picked them up (`Job.started_at - created_at`), for
+the job kinds routed to the queue in api/tasks.py.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TypedDict
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.models import Job
+from api.tasks import JOB_QUEUES
+
+# PREWARM jobs are created by their periodic fetch stage already running.
+_UNTIMED_KINDS = {Job.Kind.PREWARM}
+
+
+class WaitStats(TypedDict):
+    count: int
+    p50: float | None
+    p95: float | None
+    max: float | None
+
+
+class QueueStats(TypedDict):
+    name: str
+    worker_type: str
+    workers: int
+    pending: int
+    scheduled: int
+    oldest_queued_seconds: float | None
+    wait_seconds: WaitStats
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _wait_stats(kinds: list[str], since) -> WaitStats:
+    rows = Job.objects.filter(kind__in=kinds, started_at__gte=since).values_list("created_at", "started_at")
+    waits = sorted((started - created).total_seconds() for created, started in rows)
+    return {
+        "count": len(waits),
+        "p50": _percentile(waits, 0.5),
+        "p95": _percentile(waits, 0.95),
+        "max": waits[-1] if waits else None,
+    }
+
+
+def queue_stats(window_minutes: int = 60) -> list[QueueStats]:
+    """One entry per queue; wait percentiles cover jobs started in the window."""
+    now = timezone.now()
+    since = now - timedelta(minutes=window_minutes)
+    stats: list[QueueStats] = []
+    for name, queue in settings.HUEY_QUEUES.items():
+        huey = queue["huey"]
+        kinds = [kind for kind, routed in JOB_QUEUES.items() if routed is huey and kind not in _UNTIMED_KINDS]
+        oldest = (
+            Job.objects.filter(kind__in=kinds, status=Job.Status.QUEUED, started_at__isnull=True)
+            .order_by("created_at")
+            .values_list("created_at", flat=True)
+            .first()
+        )
+        stats.append(
+            {
+                "name": name,
+                "worker_type": queue["consumer"]["worker_type"],
+                "workers": queue["consumer"]["workers"],
+                "pending": huey.pending_count(),
+                "scheduled": huey.scheduled_count(),
+                "oldest_queued_seconds": (now - oldest).total_seconds() if oldest else None,
+                "wait_seconds": _wait_stats(kinds, since),
+            }
+        )
+    return stats
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import timedelta
+from typing import TypedDict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from api.models import HNBatch, HNItem, HNStory, Job
+
+
+class RetentionPolicy(TypedDict):
+    keep_batches: int
+    job_days: int
+    mirror_days: int
+    batch_chunk_size: int
+    job_chunk_size: int
+    job_stale_minutes: int
+    vacuum_min_free_ratio: float
+
+
+class RetentionReport(TypedDict):
+    stale_jobs_failed: int
+    batches_deleted: int
+    stories_deleted: int
+    jobs_deleted: int
+    mirror_items_deleted: int
+    vacuumed: list[str]
+
+
+ACTIVE_JOB_STATUSES = (Job.Status.QUEUED, Job.Status.RUNNING)
+FETCH_JOB_KINDS = (Job.Kind.FETCH_BATCH, Job.Kind.PREWARM)
+
+
+def get_policy(**overrides) -> RetentionPolicy:
+    policy: RetentionPolicy = {
+        "keep_batches": settings.RETENTION_KEEP_BATCHES,
+        "job_days": settings.RETENTION_JOB_DAYS,
+        "mirror_days": settings.HN_MIRROR_RETENTION_DAYS,
+        "batch_chunk_size": settings.RETENTION_BATCH_CHUNK_SIZE,
+        "job_chunk_size": settings.RETENTION_JOB_CHUNK_SIZE,
+        "job_stale_minutes": settings.JOB_STALE_MINUTES,
+        "vacuum_min_free_ratio": settings.RETENTION_VACUUM_MIN_FREE_RATIO,
+    }
+    policy.update({key: value for key, value in overrides.items() if value is not None})
+    return policy
+
+
+def _delete_in_chunks(queryset: QuerySet, chunk_size: int, dry_run: bool = False) -> int:
+    """Delete rows a chunk at a time so each write transaction stays short."""
+    if dry_run:
+        return queryset.count()
+
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            queryset.model.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def stale_jobs(policy: RetentionPolicy) -> QuerySet:
+    """Queued/running jobs nothing has touched for `job_stale_minutes`.
+
+    Their worker died or their task was never enqueued; left active they
+    would pin their batch and never expire.
+    """
+    cutoff = timezone.now() - timedelta(minutes=policy["job_stale_minutes"])
+    return Job.objects.filter(status__in=ACTIVE_JOB_STATUSES, updated_at__lt=cutoff)
+
+
+def fail_stale_jobs(policy: RetentionPolicy, dry_run: bool = False) -> int:
+    stale = stale_jobs(policy)
+    if dry_run:
+        return stale.count()
+    return stale.update(
+        status=Job.Status.ERROR,
+        message="Abandoned",
+        error=f"No progress for {policy['job_stale_minutes']} minutes",
+        updated_at=timezone.now(),
+    )
+
+
+def expired_jobs(policy: RetentionPolicy) -> QuerySet:
+    cutoff = timezone.now() - timedelta(days=policy["job_days"])
+    return Job.objects.filter(updated_at__lt=cutoff).exclude(status__in=ACTIVE_JOB_STATUSES)
+
+
+def expired_batches(policy: RetentionPolicy) -> QuerySet:
+    """Batches outside the keep window that no in-flight job still points at.
+
+    Overviews and batch memberships go with their batch; canonical stories
+    are removed separately once no batch references them.
+    """
+    kept_numbers = HNBatch.objects.order_by("-number").values_list("number", flat=True)[
+        : policy["keep_batches"]
+    ]
+    referenced = Job.objects.filter(status__in=ACTIVE_JOB_STATUSES, batch__isnull=False).values(
+        "batch_id"
+    )
+    return (
+        HNBatch.objects.exclude(number__in=list(kept_numbers))
+        .exclude(id__in=referenced)
+        .order_by("number")
+    )
+
+
+def prune_jobs(policy: RetentionPolicy, dry_run: bool = False) -> int:
+    if not dry_run:
+        # Finished jobs never resume, so their graph checkpoints can go first.
+        from api.services.analysis_graph import delete_checkpoints
+
+        delete_checkpoints(list(expired_jobs(policy).values_list("id", flat=True)))
+    return _delete_in_chunks(expired_jobs(policy), policy["job_chunk_size"], dry_run)
+
+
+def prune_batches(policy: RetentionPolicy, dry_run: bool = False) -> int:
+    return _delete_in_chunks(expired_batches(policy), policy["batch_chunk_size"], dry_run)
+
+
+def prune_orphan_stories(policy: RetentionPolicy, dry_run: bool = False) -> int:
+    # A fetch links its stories to the new batch only once all are in, so
+    # nothing unlinked is safe to delete while one runs. The age guard covers
+    # a fetch that starts mid-prune.
+    if Job.objects.filter(kind__in=FETCH_JOB_KINDS, status=Job.Status.RUNNING).exists():
+        return 0
+    orphans = HNStory.objects.filter(
+        memberships__isnull=True,
+        fetched_at__lt=timezone.now() - timedelta(hours=1),
+    )
+    return _delete_in_chunks(orphans, policy["job_chunk_size"], dry_run)
+
+
+def prune_mirror(policy: RetentionPolicy, dry_run: bool = False) -> int:
+    cutoff = timezone.now() - timedelta(days=policy["mirror_days"])
+    return _delete_in_chunks(HNItem.objects.filter(synced_at__lt=cutoff), policy["job_chunk_size"], dry_run)
+
+
+def _compact(cursor, min_free_ratio: float) -> bool:
+    cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    cursor.execute("ANALYZE")
+    cursor.execute("PRAGMA page_count")
+    page_count = cursor.fetchone()[0]
+    cursor.execute("PRAGMA freelist_count")
+    free_count = cursor.fetchone()[0]
+    if not page_count or free_count / page_count < min_free_ratio:
+        return False
+    cursor.execute("VACUUM")
+    cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return True
+
+
+def compact_databases(policy: RetentionPolicy) -> list[str]:
+    """Checkpoint WAL, refresh planner stats, and VACUUM when enough pages are free.
+
+    Returns the names of the databases that were vacuumed.
+    """
+    vacuumed: list[str] = []
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            if _compact(cursor, policy["vacuum_min_free_ratio"]):
+                vacuumed.append(str(settings.DATABASES["default"]["NAME"]))
+
+    for queue in settings.HUEY_QUEUES.values():
+        huey_filename = getattr(queue["huey"].storage, "filename", None)
+        if not huey_filename:
+            continue
+        conn = sqlite3.connect(huey_filename, timeout=30, isolation_level=None)
+        try:
+            if _compact(conn.cursor(), policy["vacuum_min_free_ratio"]):
+                vacuumed.append(huey_filename)
+        finally:
+            conn.close()
+    return vacuumed
+
+
+def run_retention(
+    policy: RetentionPolicy | None = None,
+    compact: bool = True,
+    dry_run: bool = False,
+) -> RetentionReport:
+    policy = policy or get_policy()
+    stale_jobs_failed = fail_stale_jobs(policy, dry_run=dry_run)
+    jobs_deleted = prune_jobs(policy, dry_run=dry_run)
+    batches_deleted = prune_batches(policy, dry_run=dry_run)
+    stories_deleted = prune_orphan_stories(policy, dry_run=dry_run)
+    mirror_items_deleted = prune_mirror(policy, dry_run=dry_run)
+    vacuumed = compact_databases(policy) if compact and not dry_run else []
+    return {
+        "stale_jobs_failed": stale_jobs_failed,
+        "batches_deleted": batches_deleted,
+        "stories_deleted": stories_deleted,
+        "jobs_deleted": jobs_deleted,
+        "mirror_items_deleted": mirror_items_deleted,
+        "vacuumed": vacuumed,
+    }
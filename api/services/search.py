@@ -0,0 +1,184 @@
+"""Full-text search over stories (title, article text, summary) and overviews.
+
+Backed by the SQLite FTS5 tables from migration 0008. Triggers on the story,
+content, summary and overview tables keep them current on every write, so
+`rebuild_index` is only needed after restoring data or changing the tokenizer.
+"""
+from __future__ import annotations
+
+import re
+from importlib import import_module
+from typing import TypedDict
+
+from django.db import connection, transaction
+
+from api.models import HNBatchStory, HNOverviewArticle, HNStory
+
+SEARCH_KINDS = ("story", "overview")
+
+# bm25 column weights for api_story_fts: title, content, summary.
+STORY_WEIGHTS = (5.0, 1.0, 2.0)
+STORY_SUMMARY_COLUMN = 2
+SNIPPET_TOKENS = 16
+
+
+class SearchPage(TypedDict):
+    results: list[dict]
+    has_more: bool
+
+
+def build_match_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches documents containing every word.
+
+    Words are quoted, so FTS5 operators and punctuation in user input are
+    never interpreted as query syntax.
+    """
+    terms = re.findall(r"\w+", text)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def _ranked_hits(
+    match: str,
+    kinds: set[str],
+    limit: int,
+    offset: int,
+    bio_hash: str | None,
+) -> list[tuple[str, int, float]]:
+    parts: list[str] = []
+    params: list = []
+    if "story" in kinds:
+        weights = ", ".join(str(weight) for weight in STORY_WEIGHTS)
+        parts.append(
+            f"SELECT 'story', rowid, bm25(api_story_fts, {weights}) AS score "
+            "FROM api_story_fts WHERE api_story_fts MATCH %s"
+        )
+        params.append(match)
+    if "overview" in kinds:
+        sql = (
+            "SELECT 'overview', rowid, bm25(api_overview_fts) AS score "
+            "FROM api_overview_fts WHERE api_overview_fts MATCH %s"
+        )
+        params.append(match)
+        if bio_hash:
+            sql += " AND bio_hash = %s"
+            params.append(bio_hash)
+        parts.append(sql)
+
+    sql = " UNION ALL ".join(parts) + " ORDER BY score LIMIT %s OFFSET %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, limit, offset])
+        return cursor.fetchall()
+
+
+def _snippets(table: str, column: int, match: str, rowids: list[int]) -> dict[int, str]:
+    """Snippets for one page only; computing them in the ranking query would cost one per match."""
+    if not rowids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(rowids))
+    sql = (
+        f"SELECT rowid, snippet({table}, {column}, '**', '**', '…', {SNIPPET_TOKENS}) "
+        f"FROM {table} WHERE {table} MATCH %s AND rowid IN ({placeholders})"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *rowids])
+        return dict(cursor.fetchall())
+
+
+def _story_snippets(match: str, rowids: list[int]) -> dict[int, str]:
+    # Snippets tokenize the whole column, so try the short summary first and
+    # only fall back to the article text for stories whose summary has no hit.
+    snippets = _snippets("api_story_fts", STORY_SUMMARY_COLUMN, match, rowids)
+    misses = [rowid for rowid in rowids if "**" not in snippets.get(rowid, "")]
+    snippets.update(_snippets("api_story_fts", -1, match, misses))
+    return snippets
+
+
+def search(
+    text: str,
+    limit: int = 20,
+    offset: int = 0,
+    kinds: set[str] | None = None,
+    bio_hash: str | None = None,
+) -> SearchPage:
+    """Rank stories and overviews matching `text` with bm25, best first.
+
+    Story results list every batch the story appeared in. `bio_hash`
+    restricts overview results to one reader.
+    """
+    match = build_match_query(text)
+    kinds = set(kinds or SEARCH_KINDS)
+    if not match or not kinds:
+        return {"results": [], "has_more": False}
+
+    hits = _ranked_hits(match, kinds, limit + 1, offset, bio_hash)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+
+    story_ids = [rowid for kind, rowid, _ in hits if kind == "story"]
+    overview_ids = [rowid for kind, rowid, _ in hits if kind == "overview"]
+    story_snippets = _story_snippets(match, story_ids)
+    overview_snippets = _snippets("api_overview_fts", 0, match, overview_ids)
+
+    stories = {story.id: story for story in HNStory.objects.filter(id__in=story_ids)}
+    batch_numbers: dict[int, list[int]] = {}
+    memberships = (
+        HNBatchStory.objects.filter(story_id__in=story_ids)
+        .order_by("-batch__number")
+        .values_list("story_id", "batch__number")
+    )
+    for story_id, number in memberships:
+        batch_numbers.setdefault(story_id, []).append(number)
+    overviews = {
+        row["id"]: row
+        for row in HNOverviewArticle.objects.filter(id__in=overview_ids).values("id", "bio_hash", "batch__number")
+    }
+
+    results: list[dict] = []
+    for kind, rowid, score in hits:
+        if kind == "story" and rowid in stories:
+            story = stories[rowid]
+            results.append(
+                {
+                    "type": "story",
+                    "story_id": story.id,
+                    "hn_id": story.hn_id,
+                    "title": story.title,
+                    "url": story.url,
+                    "batch_numbers": batch_numbers.get(story.id, []),
+                    "snippet": story_snippets.get(rowid, ""),
+                    "score": -score,
+                }
+            )
+        elif kind == "overview" and rowid in overviews:
+            overview = overviews[rowid]
+            results.append(
+                {
+                    "type": "overview",
+                    "overview_id": rowid,
+                    "batch_number": overview["batch__number"],
+                    "bio_hash": overview["bio_hash"],
+                    "snippet": overview_snippets.get(rowid, ""),
+                    "score": -score,
+                }
+            )
+    return {"results": results, "has_more": has_more}
+
+
+# The document SQL lives in the migration that created the tables, so the
+# index is rebuilt exactly the way the triggers maintain it.
+_search_migration = import_module("api.migrations.0008_search_index")
+REBUILD_SQL = ["DELETE FROM api_story_fts", "DELETE FROM api_overview_fts", *_search_migration.POPULATE]
+
+
+def rebuild_index() -> dict[str, int]:
+    """Re-derive both FTS tables from the source rows, then merge their b-trees."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+        for table in ("api_story_fts", "api_overview_fts"):
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+        cursor.execute("SELECT count(*) FROM api_story_fts")
+        stories = cursor.fetchone()[0]
+        cursor.execute("SELECT count(*) FROM api_overview_fts")
+        overviews = cursor.fetchone()[0]
+    return {"stories": stories, "overviews": overviews}
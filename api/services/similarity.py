@@ -0,0 +1,66 @@
+"""MinHash signatures for spotting near-duplicate reader bios.
+
+Each overview stores the signature of the bio it was written for, so the
+overviews of a batch double as its similarity index: a new bio is compared
+against at most one signature per reader, no bio text needs to be kept.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+
+from django.conf import settings
+
+from api.models import HNBatch, HNOverviewArticle
+from api.services.profiles import normalize_bio
+
+NUM_PERMUTATIONS = 128
+SHINGLE_WORDS = 2
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures are stored, so the permutations must never change.
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def bio_shingles(bio_text: str) -> set[str]:
+    """Overlapping word pairs of the normalized bio (the whole bio if it is one word)."""
+    words = normalize_bio(bio_text).split()
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def bio_signature(bio_text: str) -> list[int]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in bio_shingles(bio_text)
+    ]
+    if not hashes:
+        return []
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(left: list[int], right: list[int]) -> float:
+    """Estimated Jaccard similarity of the two bios' shingle sets."""
+    if not left or len(left) != len(right):
+        return 0.0
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+def find_similar_overview(
+    batch: HNBatch,
+    signature: list[int],
+    threshold: float | None = None,
+) -> tuple[HNOverviewArticle, float] | None:
+    """The batch's overview whose bio is most similar, if it reaches the threshold."""
+    if threshold is None:
+        threshold = settings.BIO_REUSE_THRESHOLD
+    best_id, best_score = None, 0.0
+    for overview_id, stored in batch.overviews.filter(bio_signature__isnull=False).values_list("id", "bio_signature"):
+        score = estimate_similarity(signature, stored)
+        if score > best_score:
+            best_id, best_score = overview_id, score
+    if best_id is None or best_score < threshold:
+        return None
+    return HNOverviewArticle.objects.get(id=best_id), best_score
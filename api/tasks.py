@@ -1,21 +1,79 @@
 from __future__ import annotations
 
-import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
+from django.conf import settings
 from django.db import transaction
-from huey.contrib.djhuey import task
+from django.utils import timezone
+from huey import crontab
+from huey.exceptions import RetryTask, TaskLockedException
 
 from api.models import (
     HNBatch,
+    HNBatchStory,
     HNOverviewArticle,
     HNStory,
     HNStoryContent,
     HNStorySummary,
     Job,
+    SummaryClaim,
 )
-from api.services.analysis_graph import run_overview_generation, run_summary_analysis
-from api.services.extract import extract_article_text
-from api.services.hn import get_item, get_top_story_ids
+from api.services.profiles import fanout_profiles, hash_bio
+from api.services.retention import run_retention
+from api.services.similarity import bio_signature, find_similar_overview
+
+# The web process imports this module (views enqueue tasks, and djhuey
+# autodiscovers it), so the LLM stack (langchain/langgraph), trafilatura and
+# the HN client are imported inside the functions that need them. Workers
+# load them once at startup via preload_worker_modules().
+
+
+def preload_worker_modules() -> None:
+    import api.services.analysis_graph  # noqa: F401
+    import api.services.extract  # noqa: F401
+    import api.services.hn_mirror  # noqa: F401
+
+
+# Task routing. Each queue has its own consumer and worker pool
+# (HUEY_QUEUES in settings, `manage.py run_queue_workers <queue>`):
+# downloads, extraction and maintenance run on "fetch"; LLM calls on "llm".
+fetch_queue = settings.HUEY_QUEUES["fetch"]["huey"]
+llm_queue = settings.HUEY_QUEUES["llm"]["huey"]
+
+# Queue holding a job's task id. PREWARM jobs are created by the periodic
+# fetch stage, which has no id; only their llm summary stage is enqueued.
+JOB_QUEUES = {
+    Job.Kind.FETCH_BATCH: fetch_queue,
+    Job.Kind.ANALYZE_BATCH: llm_queue,
+    Job.Kind.OVERVIEW_FANOUT: llm_queue,
+    Job.Kind.PREWARM: llm_queue,
+}
+
+
+# One batch fetch at a time across the fetch workers (user fetches and the
+# pre-warm fetch stage): concurrent fetches race on new story rows and on the
+# next batch number. Consumers flush it at startup in case a worker died
+# holding it.
+fetch_lock = fetch_queue.lock_task("fetch-batch")
+
+
+@fetch_queue.on_startup()
+@llm_queue.on_startup()
+def _preload_on_worker_startup() -> None:
+    preload_worker_modules()
+
+
+class JobCancelled(Exception):
+    """Raised inside a task once its job has been cancelled or superseded."""
+
+
+class SummariesClaimed(Exception):
+    """Raised when another live job is already generating the batch's summaries."""
+
+    def __init__(self, job_id: int):
+        super().__init__(job_id)
+        self.job_id = job_id
 
 
 def _next_batch_number() -> int:
@@ -32,52 +90,283 @@ def _update_job(job: Job, **kwargs) -> None:
     job.save(update_fields=update_fields)
 
 
-@task()
-def fetch_batch_job(job_id: int) -> None:
-    job = Job.objects.get(id=job_id)
-    _update_job(job, status=Job.Status.RUNNING, message="Fetching top stories")
+def _check_cancelled(job: Job) -> None:
+    if Job.objects.filter(id=job.id, status=Job.Status.CANCELLED).exists():
+        raise JobCancelled(job.id)
+
+
+def _start_job(job_id: int, message: str, select_related: tuple[str, ...] = ()) -> Job | None:
+    """Mark the job running, or return None if it was cancelled while queued."""
+    job = Job.objects.select_related(*select_related).get(id=job_id)
+    if job.status == Job.Status.CANCELLED:
+        return None
+    # Keep the first start on retries: queue wait is measured up to it.
+    _update_job(job, status=Job.Status.RUNNING, message=message, started_at=job.started_at or timezone.now())
+    return job
+
+
+def enqueue_job(task_fn, job: Job, *args) -> None:
+    """Enqueue a task for the job and remember the Huey task id so it can be revoked."""
+    result = task_fn(job.id, *args)
+    task_id = getattr(result, "id", "")
+    if task_id:
+        Job.objects.filter(id=job.id).update(task_id=task_id)
+        job.task_id = task_id
+
+
+def request_cancel(job: Job, message: str = "Cancelled") -> bool:
+    """Cancel a queued or running job.
+
+    Queued tasks are revoked outright; running tasks notice the status change
+    at their next cancellation check and stop. Returns False if the job had
+    already finished.
+    """
+    cancelled = Job.objects.filter(
+        id=job.id,
+        status__in=[Job.Status.QUEUED, Job.Status.RUNNING],
+    ).update(status=Job.Status.CANCELLED, message=message, updated_at=timezone.now())
+    if cancelled and job.task_id:
+        JOB_QUEUES[job.kind].revoke_by_id(job.task_id)
+    return bool(cancelled)
+
+
+def supersede_jobs(new_job: Job) -> int:
+    """Cancel the same client's older analyze jobs that are still queued or running."""
+    if not new_job.client_id:
+        return 0
+    stale = Job.objects.filter(
+        kind=Job.Kind.ANALYZE_BATCH,
+        client_id=new_job.client_id,
+        status__in=[Job.Status.QUEUED, Job.Status.RUNNING],
+        id__lt=new_job.id,
+    )
+    return sum(request_cancel(job, f"Superseded by job {new_job.id}") for job in stale)
+
+
+def _upsert_story(story: HNStory | None, item: dict) -> HNStory:
+    if story is None:
+        # The row may exist by now even though it was missing when `existing`
+        # was read, e.g. from a fetch that held the lock before this one.
+        story, created = HNStory.objects.get_or_create(
+            hn_id=item["id"], defaults={"title": item["title"], "url": item["url"]}
+        )
+        if created:
+            return story
+    if (story.title, story.url) != (item["title"], item["url"]):
+        story.title = item["title"]
+        story.url = item["url"]
+        story.save(update_fields=["title", "url"])
+    return story
+
+
+def _story_is_stale(story: HNStory, stale_before: datetime) -> bool:
+    """Content is re-extracted when missing, failed, or older than the max age."""
+    content = getattr(story, "content", None)
+    if content is None or content.error:
+        return True
+    return story.fetched_at is None or story.fetched_at < stale_before
+
+
+def _refresh_story_content(story: HNStory, url: str) -> None:
+    from api.services.extract import extract_article_text
+
+    text, word_count, error = extract_article_text(url)
+    content, created = HNStoryContent.objects.get_or_create(
+        story=story,
+        defaults={"extracted_text": text, "word_count": word_count, "error": error},
+    )
+    if not created:
+        if error and content.extracted_text:
+            # Keep the last good text (and its summaries) through a failed
+            # re-download; fetched_at stays old so the next fetch retries it.
+            return
+        if content.extracted_text != text:
+            # Summaries describe the old text; let the next analysis regenerate them.
+            story.summaries.all().delete()
+        content.extracted_text = text
+        content.word_count = word_count
+        content.error = error
+        content.save(update_fields=["extracted_text", "word_count", "error"])
+    story.fetched_at = timezone.now()
+    story.save(update_fields=["fetched_at"])
+
 
+def _batch_summaries(batch: HNBatch) -> list[dict]:
+    memberships = list(batch.memberships.select_related("story").order_by("rank"))
+    summary_map = dict(
+        HNStorySummary.objects.filter(story_id__in=[m.story_id for m in memberships])
+        .order_by("created_at")
+        .values_list("story_id", "summary_text")
+    )
+    return [
+        {
+            "story_id": m.story_id,
+            "title": m.story.title,
+            "url": m.story.url,
+            "summary": summary_map.get(m.story_id),
+        }
+        for m in memberships
+    ]
+
+
+def _pick_top_stories() -> list[dict]:
+    from api.services.hn_mirror import resolve_items, top_story_ids
+
+    candidates = resolve_items(top_story_ids()[: settings.HN_TOP_CANDIDATES])
+    return [item for item in candidates if item["url"] and not item["deleted"]][:10]
+
+
+def _fetch_batch(job: Job, picked: list[dict] | None = None) -> HNBatch:
+    """Fetch the top stories, then publish them as the next batch.
+
+    The batch and its memberships are written together once every story is
+    in, so a cancelled or failed fetch leaves no partial batch for
+    /batches/latest/ or a default analyze to pick up.
+    """
+    _update_job(job, progress_total=0, progress_current=0, message="Fetching story list")
+    if picked is None:
+        picked = _pick_top_stories()
+
+    if not picked:
+        raise RuntimeError("No top stories with URLs available.")
+
+    _update_job(job, progress_total=len(picked), progress_current=0, message="Fetched story list")
+
+    existing = {
+        story.hn_id: story
+        for story in HNStory.objects.select_related("content").filter(
+            hn_id__in=[item["id"] for item in picked]
+        )
+    }
+    stale_before = timezone.now() - timedelta(hours=settings.STORY_CONTENT_MAX_AGE_HOURS)
+    stories: list[HNStory] = []
+    extracted = 0
+    for idx, item in enumerate(picked, start=1):
+        _check_cancelled(job)
+        story = _upsert_story(existing.get(item["id"]), item)
+        if _story_is_stale(story, stale_before):
+            _refresh_story_content(story, item["url"])
+            extracted += 1
+        stories.append(story)
+        _update_job(
+            job,
+            progress_current=idx,
+            message=f"Fetched {idx}/{len(picked)} ({extracted} new or stale)",
+        )
+
+    _check_cancelled(job)
+    with transaction.atomic():
+        batch = HNBatch.objects.create(number=_next_batch_number())
+        HNBatchStory.objects.bulk_create(
+            [HNBatchStory(batch=batch, story=story, rank=rank) for rank, story in enumerate(stories, start=1)]
+        )
+        _update_job(job, batch=batch, message="Created batch")
+    return batch
+
+
+def _missing_summary_count(batch: HNBatch) -> int:
+    return batch.memberships.filter(story__summaries__isnull=True).count()
+
+
+def _claim_summaries(job: Job, batch: HNBatch) -> None:
+    """Make `job` the one generating the batch's summaries, or raise SummariesClaimed.
+
+    A claim left by a job that finished, failed or went stale without
+    releasing it (a killed worker) is taken over.
+    """
+    claim, created = SummaryClaim.objects.get_or_create(batch=batch, defaults={"job": job})
+    if created or claim.job_id == job.id:
+        return
+    live_after = timezone.now() - timedelta(minutes=settings.JOB_STALE_MINUTES)
+    holder_live = Job.objects.filter(
+        id=claim.job_id,
+        status__in=[Job.Status.QUEUED, Job.Status.RUNNING],
+        updated_at__gte=live_after,
+    ).exists()
+    # Conditional on the holder, so two jobs cannot both take over one claim.
+    if holder_live or not SummaryClaim.objects.filter(id=claim.id, job_id=claim.job_id).update(
+        job=job, claimed_at=timezone.now()
+    ):
+        raise SummariesClaimed(claim.job_id)
+
+
+def _ensure_summaries(
+    job: Job,
+    batch: HNBatch,
+    extra_steps: int = 0,
+    concurrency: int | None = None,
+) -> int:
+    """Generate summaries for batch stories that lack one; returns how many were missing.
+
+    Only one job per batch generates at a time; the others get
+    SummariesClaimed and decide whether to wait for it.
+    """
+    if not _missing_summary_count(batch):
+        _update_job(job, progress_total=extra_steps, progress_current=0, message="Summaries already exist")
+        return 0
+
+    _claim_summaries(job, batch)
     try:
-        with transaction.atomic():
-            batch = HNBatch.objects.create(number=_next_batch_number())
-            job.batch = batch
-            job.progress_total = 0
-            job.progress_current = 0
-            job.message = "Created batch"
-            job.save()
-
-        story_ids = get_top_story_ids()
-        picked: list[dict] = []
-        for item_id in story_ids:
-            item = get_item(item_id)
-            if item["url"]:
-                picked.append(item)
-            if len(picked) == 10:
-                break
-
-        if not picked:
-            raise RuntimeError("No top stories with URLs available.")
-
-        _update_job(job, progress_total=len(picked), progress_current=0, message="Fetched story list")
-
-        for idx, item in enumerate(picked, start=1):
-            story = HNStory.objects.create(
-                batch=batch,
-                hn_id=item["id"],
-                rank=idx,
-                title=item["title"],
-                url=item["url"],
-            )
-            text, word_count, error = extract_article_text(item["url"])
-            HNStoryContent.objects.create(
-                story=story,
-                extracted_text=text,
-                word_count=word_count,
-                error=error,
-            )
-            _update_job(job, progress_current=idx, message=f"Fetched {idx}/{len(picked)}")
+        return _generate_summaries(job, batch, extra_steps, concurrency)
+    finally:
+        SummaryClaim.objects.filter(batch=batch, job=job).delete()
+
+
+def _generate_summaries(job: Job, batch: HNBatch, extra_steps: int, concurrency: int | None) -> int:
+    # Counted again under the claim: the previous holder may have just finished.
+    missing_count = _missing_summary_count(batch)
+    if not missing_count:
+        _update_job(job, progress_total=extra_steps, progress_current=0, message="Summaries already exist")
+        return 0
+
+    _update_job(
+        job,
+        progress_total=missing_count + extra_steps,
+        progress_current=0,
+        message="Generating summaries",
+    )
+    from api.services.analysis_graph import checkpoint_thread_id, run_summary_analysis
+
+    saved = 0
+
+    def save_summary(summary: dict) -> None:
+        # Persist as each story finishes so a crash only loses in-flight calls.
+        nonlocal saved
+        HNStorySummary.objects.update_or_create(
+            story_id=summary["story_id"],
+            defaults={"summary_text": summary["summary"]},
+        )
+        saved += 1
+        _update_job(job, progress_current=saved, message=f"Saved summary {saved}/{missing_count}")
+
+    run_summary_analysis(
+        batch_number=batch.number,
+        concurrency=concurrency,
+        check_cancelled=lambda: _check_cancelled(job),
+        on_summary=save_summary,
+        thread_id=checkpoint_thread_id(job.id),
+    )
+    return missing_count
+
+
+@fetch_queue.task(priority=settings.JOB_PRIORITIES["FETCH_BATCH"])
+def fetch_batch_job(job_id: int) -> None:
+    job = _start_job(job_id, "Fetching top stories")
+    if job is None:
+        return
 
+    try:
+        with fetch_lock:
+            _fetch_batch(job)
+        _check_cancelled(job)
         _update_job(job, status=Job.Status.COMPLETE, message="Batch fetched")
+    except JobCancelled:
+        return
+    except TaskLockedException:
+        # Wait for the running fetch; the retry keeps the task id, so the job
+        # can still be cancelled while it waits.
+        _update_job(job, status=Job.Status.QUEUED, message="Waiting for another fetch")
+        raise RetryTask(delay=settings.FETCH_LOCK_RETRY_SECONDS)
     except Exception as exc:
         _update_job(
             job,
@@ -87,59 +376,314 @@ def fetch_batch_job(job_id: int) -> None:
         )
 
 
-@task()
-def analyze_batch_job(job_id: int, batch_number: int, bio_text: str) -> None:
-    job = Job.objects.get(id=job_id)
-    _update_job(job, status=Job.Status.RUNNING, message="Analyzing batch")
+def _save_overview(
+    batch: HNBatch,
+    bio_hash: str,
+    signature: list[int],
+    article_text: str,
+    reused_from_id: int | None = None,
+) -> None:
+    HNOverviewArticle.objects.update_or_create(
+        batch=batch,
+        bio_hash=bio_hash,
+        defaults={
+            "article_text": article_text,
+            "bio_signature": signature or None,
+            "reused_from_id": reused_from_id,
+        },
+    )
+
+
+def _reuse_overview(batch: HNBatch, bio_hash: str, signature: list[int]) -> float | None:
+    """Give the reader an overview already written for the batch, if one fits.
+
+    An overview for the same normalized bio counts as a full match; otherwise
+    the most similar bio at or above BIO_REUSE_THRESHOLD donates its
+    overview. Returns the similarity, or None when a new overview is needed.
+    """
+    if HNOverviewArticle.objects.filter(batch=batch, bio_hash=bio_hash).exists():
+        return 1.0
+    match = find_similar_overview(batch, signature)
+    if match is None:
+        return None
+    source, similarity = match
+    _save_overview(batch, bio_hash, signature, source.article_text, source.reused_from_id or source.id)
+    return similarity
+
+
+@llm_queue.task(
+    priority=settings.JOB_PRIORITIES["ANALYZE_BATCH"],
+    retries=settings.ANALYZE_RETRIES,
+    retry_delay=settings.ANALYZE_RETRY_DELAY_SECONDS,
+    context=True,
+)
+def analyze_batch_job(job_id: int, batch_number: int, bio_text: str, force: bool = False, task=None) -> None:
+    """Summarize missing stories, then write the reader's overview.
+
+    Unless `force` is set, an existing overview for the same or a
+    near-duplicate bio is reused instead of generating a new one.
+
+    Failed runs are retried by Huey under the same job id; summaries saved so
+    far are kept and the summary graph resumes from its checkpoint.
+    """
+    from api.services.analysis_graph import run_overview_generation
+
+    job = _start_job(job_id, "Analyzing batch")
+    if job is None:
+        return
 
     try:
         batch = HNBatch.objects.get(number=batch_number)
         _update_job(job, batch=batch)
-        bio_hash = hashlib.sha256(bio_text.encode("utf-8")).hexdigest()
-        story_ids = list(batch.stories.order_by("rank").values_list("id", flat=True))
-        existing_count = HNStorySummary.objects.filter(story_id__in=story_ids).count()
-
-        summaries: list[dict] = []
-        if existing_count < len(story_ids):
-            _update_job(job, message="Generating summaries")
-            result = run_summary_analysis(batch_number=batch_number)
-            summaries = result.get("summaries", [])
-            _update_job(job, progress_total=len(summaries) + 1, progress_current=0)
-
-            for idx, summary in enumerate(summaries, start=1):
-                HNStorySummary.objects.update_or_create(
-                    story_id=summary["story_id"],
-                    defaults={"summary_text": summary["summary"]},
+        bio_hash = hash_bio(bio_text)
+        signature = bio_signature(bio_text)
+        if not force:
+            similarity = _reuse_overview(batch, bio_hash, signature)
+            if similarity is not None:
+                _enqueue_fanout(batch)
+                _update_job(
+                    job,
+                    status=Job.Status.COMPLETE,
+                    progress_total=1,
+                    progress_current=1,
+                    message=f"Reused an existing overview ({similarity:.0%} bio match)",
                 )
-                _update_job(job, progress_current=idx, message=f"Saved summary {idx}/{len(summaries)}")
-        else:
-            _update_job(job, progress_total=len(story_ids) + 1, progress_current=0, message="Summaries already exist")
-            summaries = [
-                {
-                    "story_id": story.id,
-                    "title": story.title,
-                    "url": story.url,
-                    "summary": HNStorySummary.objects.filter(story=story)
-                    .order_by("-created_at")
-                    .values_list("summary_text", flat=True)
-                    .first(),
-                }
-                for story in batch.stories.order_by("rank")
-            ]
+                return
+
+        missing_count = _ensure_summaries(job, batch, extra_steps=1)
 
+        _check_cancelled(job)
+        summaries = _batch_summaries(batch)
         overview_text = run_overview_generation(bio_text=bio_text, summaries=summaries)
-        HNOverviewArticle.objects.update_or_create(
-            batch=batch,
-            bio_hash=bio_hash,
-            defaults={"article_text": overview_text},
-        )
+        _check_cancelled(job)
+        _save_overview(batch, bio_hash, signature, overview_text)
+        # Only now: the requester's profile is already saved, and the fanout
+        # would otherwise generate a second overview for it.
+        _enqueue_fanout(batch)
 
-        _update_job(job, progress_current=len(summaries) + 1, message="Saved overview")
+        _update_job(job, progress_current=missing_count + 1, message="Saved overview")
         _update_job(job, status=Job.Status.COMPLETE, message="Analysis complete")
+    except JobCancelled:
+        return
+    except SummariesClaimed as exc:
+        # Wait for that job's summaries instead of generating them twice; the
+        # retry keeps the task id and does not use up ANALYZE_RETRIES.
+        _update_job(job, status=Job.Status.QUEUED, message=f"Waiting for summaries from job {exc.job_id}")
+        raise RetryTask(delay=settings.SUMMARY_CLAIM_RETRY_SECONDS)
     except Exception as exc:
+        if task is not None and task.retries > 0:
+            _update_job(job, status=Job.Status.QUEUED, error=str(exc), message="Retrying after error")
+            raise
         _update_job(
             job,
             status=Job.Status.ERROR,
             error=str(exc),
             message="Failed to analyze batch",
         )
+
+
+def _enqueue_fanout(batch: HNBatch) -> None:
+    """Warm overviews for saved profiles, once per batch, for the batch readers will land on.
+
+    Decided from the batch's state rather than by whoever generated its
+    summaries, so a retried or superseded analyze still gets it queued.
+    """
+    latest = HNBatch.objects.order_by("-number").first()
+    if not latest or latest.id != batch.id or _missing_summary_count(batch):
+        return
+    if Job.objects.filter(kind=Job.Kind.OVERVIEW_FANOUT, batch=batch).exists():
+        return
+    job = Job.objects.create(kind=Job.Kind.OVERVIEW_FANOUT, status=Job.Status.QUEUED, batch=batch)
+    enqueue_job(fanout_overviews_job, job)
+
+
+@llm_queue.task(priority=settings.JOB_PRIORITIES["OVERVIEW_FANOUT"])
+def fanout_overviews_job(job_id: int) -> None:
+    """Generate overviews for active reader profiles, most recently seen first.
+
+    Profiles whose bio is a near-duplicate of one already covered reuse that
+    overview. At most PROFILE_FANOUT_CONCURRENCY overviews are generated at
+    once; each is saved as soon as it finishes, and one failure does not stop
+    the rest.
+    """
+    from api.services.analysis_graph import run_overview_generation
+
+    job = _start_job(job_id, "Generating profile overviews", select_related=("batch",))
+    if job is None:
+        return
+
+    try:
+        batch = job.batch
+        profiles = list(fanout_profiles(batch))
+        signatures = {profile.id: bio_signature(profile.bio_text) for profile in profiles}
+        pending = [
+            profile
+            for profile in profiles
+            if _reuse_overview(batch, profile.bio_hash, signatures[profile.id]) is None
+        ]
+        reused = len(profiles) - len(pending)
+        summaries = _batch_summaries(batch)
+        _update_job(job, progress_total=len(profiles), progress_current=reused)
+
+        failed = 0
+        with ThreadPoolExecutor(max_workers=settings.PROFILE_FANOUT_CONCURRENCY) as pool:
+            futures = {
+                pool.submit(run_overview_generation, bio_text=profile.bio_text, summaries=summaries): profile
+                for profile in pending
+            }
+            for idx, future in enumerate(as_completed(futures), start=reused + 1):
+                try:
+                    _check_cancelled(job)
+                except JobCancelled:
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                profile = futures[future]
+                try:
+                    _save_overview(batch, profile.bio_hash, signatures[profile.id], future.result())
+                except Exception:
+                    failed += 1
+                _update_job(job, progress_current=idx, message=f"Generated {idx}/{len(profiles)} overviews")
+
+        message = f"Profile overviews ready ({reused} reused, {failed} failed)"
+        _update_job(job, status=Job.Status.COMPLETE, message=message)
+    except JobCancelled:
+        return
+    except Exception as exc:
+        _update_job(
+            job,
+            status=Job.Status.ERROR,
+            error=str(exc),
+            message="Failed to generate profile overviews",
+        )
+
+
+def _jobs_in_flight(kinds: list[str]) -> bool:
+    """Whether a job of these kinds is queued or running and not abandoned.
+
+    Jobs untouched for JOB_STALE_MINUTES are ignored, so one orphaned row
+    cannot switch pre-warming off until retention marks it ERROR.
+    """
+    live_after = timezone.now() - timedelta(minutes=settings.JOB_STALE_MINUTES)
+    return Job.objects.filter(
+        kind__in=kinds,
+        status__in=[Job.Status.QUEUED, Job.Status.RUNNING],
+        updated_at__gte=live_after,
+    ).exists()
+
+
+def _user_jobs_in_flight() -> bool:
+    return _jobs_in_flight([Job.Kind.FETCH_BATCH, Job.Kind.ANALYZE_BATCH])
+
+
+def _needs_new_batch(latest: HNBatch | None, picked: list[dict]) -> bool:
+    """A new batch is worth fetching when the top list moved enough or the latest is old."""
+    if latest is None:
+        return True
+    max_age = timedelta(minutes=settings.PREWARM_MAX_BATCH_AGE_MINUTES)
+    if latest.created_at < timezone.now() - max_age:
+        return True
+    latest_ids = set(latest.memberships.values_list("story__hn_id", flat=True))
+    new_count = len({item["id"] for item in picked} - latest_ids)
+    return new_count >= settings.PREWARM_MIN_NEW_STORIES
+
+
+def _prewarm_in_flight() -> bool:
+    return _jobs_in_flight([Job.Kind.PREWARM])
+
+
+@fetch_queue.periodic_task(crontab(**settings.PREWARM_SCHEDULE), priority=settings.JOB_PRIORITIES["PREWARM"])
+@fetch_queue.lock_task("prewarm")
+def prewarm_batch_job() -> None:
+    """Fetch a batch when the top list changed, then queue its summaries ahead of users.
+
+    Skips entirely while a user fetch/analyze job or an earlier pre-warm is
+    queued or running, or when the top list has not moved and the latest
+    batch already has every summary. Stops before the summary stage if a
+    user job arrived during the fetch.
+    """
+    if not settings.PREWARM_ENABLED or _user_jobs_in_flight() or _prewarm_in_flight():
+        return
+
+    picked = _pick_top_stories()
+    batch = HNBatch.objects.order_by("-number").first()
+    needs_batch = _needs_new_batch(batch, picked)
+    if not needs_batch and not _missing_summary_count(batch):
+        return
+
+    job = Job.objects.create(
+        kind=Job.Kind.PREWARM,
+        status=Job.Status.RUNNING,
+        message="Checking top stories",
+        started_at=timezone.now(),
+    )
+    try:
+        if needs_batch:
+            try:
+                with fetch_lock:
+                    batch = _fetch_batch(job, picked)
+            except TaskLockedException:
+                _update_job(job, status=Job.Status.COMPLETE, message="Skipped: another fetch is running")
+                return
+
+        _check_cancelled(job)
+        if _user_jobs_in_flight():
+            _update_job(job, status=Job.Status.COMPLETE, message="Deferred summaries to a user job")
+            return
+
+        _update_job(job, batch=batch, status=Job.Status.QUEUED, message="Queued summaries")
+        enqueue_job(prewarm_summaries_job, job)
+    except JobCancelled:
+        return
+    except Exception as exc:
+        _update_job(
+            job,
+            status=Job.Status.ERROR,
+            error=str(exc),
+            message="Failed to pre-warm batch",
+        )
+
+
+@llm_queue.task(priority=settings.JOB_PRIORITIES["PREWARM"])
+def prewarm_summaries_job(job_id: int) -> None:
+    job = _start_job(job_id, "Generating summaries", select_related=("batch",))
+    if job is None:
+        return
+    # The fetch stage checked before queueing, but a user job may have
+    # arrived while this waited; don't compete with it for the LLM.
+    if _user_jobs_in_flight():
+        _update_job(job, status=Job.Status.COMPLETE, message="Deferred summaries to a user job")
+        return
+
+    try:
+        _ensure_summaries(job, job.batch, concurrency=settings.PREWARM_SUMMARY_CONCURRENCY)
+        _update_job(job, status=Job.Status.COMPLETE, message="Batch pre-warmed")
+        _enqueue_fanout(job.batch)
+    except JobCancelled:
+        return
+    except SummariesClaimed as exc:
+        # That job finishes the batch and queues its fan-out.
+        _update_job(job, status=Job.Status.COMPLETE, message=f"Deferred summaries to job {exc.job_id}")
+    except Exception as exc:
+        _update_job(
+            job,
+            status=Job.Status.ERROR,
+            error=str(exc),
+            message="Failed to pre-warm batch",
+        )
+
+
+@fetch_queue.periodic_task(crontab(**settings.RETENTION_SCHEDULE))
+@fetch_queue.lock_task("prune-history")
+def prune_history_job() -> None:
+    if settings.RETENTION_PERIODIC_ENABLED:
+        run_retention()
+
+
+@fetch_queue.periodic_task(crontab(**settings.HN_MIRROR_SYNC_SCHEDULE))
+@fetch_queue.lock_task("sync-hn-mirror")
+def sync_hn_mirror_job() -> None:
+    if settings.HN_MIRROR_SYNC_ENABLED:
+        from api.services.hn_mirror import sync_mirror
+
+        sync_mirror()
@@ -1,3 +1,965 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from huey.exceptions import RetryTask
+from rest_framework.test import APIClient
+
+from api.models import HNBatch, HNItem, HNStory, HNStoryContent, HNStorySummary, HNSyncState, Job, ReaderProfile, SummaryClaim
+from api.services.extract import download_html, extract_article_text
+from api.services.hn_mirror import resolve_items, sync_mirror
+from api.services.profiles import hash_bio, normalize_bio
+from api.services.retention import get_policy, run_retention
+from api.services.search import search
+from api.services.similarity import bio_signature, estimate_similarity, find_similar_overview
+from api.tasks import (
+    JobCancelled,
+    analyze_batch_job,
+    fanout_overviews_job,
+    fetch_batch_job,
+    fetch_lock,
+    _fetch_batch,
+    _refresh_story_content,
+    _user_jobs_in_flight,
+    prewarm_batch_job,
+    prewarm_summaries_job,
+)
+
+
+class CanonicalStoriesMigrationTests(TransactionTestCase):
+    """0003 folds per-batch story rows into one canonical row per hn_id."""
+
+    migrate_from = [("api", "0002_bio_agnostic_summaries")]
+    migrate_to = [("api", "0003_canonical_stories")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def _migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+    def test_duplicate_hn_ids_across_batches_become_one_story(self):
+        HNBatch = self.old_apps.get_model("api", "HNBatch")
+        HNStory = self.old_apps.get_model("api", "HNStory")
+        HNStoryContent = self.old_apps.get_model("api", "HNStoryContent")
+        HNStorySummary = self.old_apps.get_model("api", "HNStorySummary")
+
+        first = HNBatch.objects.create(number=1)
+        second = HNBatch.objects.create(number=2)
+        old = HNStory.objects.create(batch=first, hn_id=100, rank=1, title="Old title", url="https://a.example/")
+        only = HNStory.objects.create(batch=first, hn_id=200, rank=2, title="Only once", url="https://b.example/")
+        new = HNStory.objects.create(batch=second, hn_id=100, rank=3, title="New title", url="https://a.example/")
+        HNStoryContent.objects.create(story=old, extracted_text="old text", word_count=2)
+        HNStorySummary.objects.create(story=old, summary_text="old summary")
+
+        apps = self._migrate()
+        HNStory = apps.get_model("api", "HNStory")
+        HNBatchStory = apps.get_model("api", "HNBatchStory")
+        HNStoryContent = apps.get_model("api", "HNStoryContent")
+        HNStorySummary = apps.get_model("api", "HNStorySummary")
+
+        self.assertEqual(
+            sorted(HNStory.objects.values_list("id", "hn_id", "title")),
+            [(only.id, 200, "Only once"), (new.id, 100, "New title")],
+        )
+        self.assertEqual(
+            sorted(HNBatchStory.objects.values_list("batch__number", "rank", "story_id")),
+            [(1, 1, new.id), (1, 2, only.id), (2, 3, new.id)],
+        )
+        # The duplicate's content and summary move onto the canonical row.
+        self.assertEqual(HNStoryContent.objects.get().story_id, new.id)
+        self.assertEqual(HNStorySummary.objects.get().story_id, new.id)
+        self.assertEqual(HNStory.objects.get(id=new.id).fetched_at, second.created_at)
+
+
+class BioNormalizationMigrationTests(TransactionTestCase):
+    """0009 re-keys profiles and overviews by the normalized bio hash."""
+
+    migrate_from = [("api", "0008_search_index")]
+    migrate_to = [("api", "0009_bio_normalization")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_colliding_profiles_and_overviews_are_merged(self):
+        HNBatch = self.old_apps.get_model("api", "HNBatch")
+        ReaderProfile = self.old_apps.get_model("api", "ReaderProfile")
+        HNOverviewArticle = self.old_apps.get_model("api", "HNOverviewArticle")
+
+        first = HNBatch.objects.create(number=1)
+        second = HNBatch.objects.create(number=2)
+        now = timezone.now()
+        ReaderProfile.objects.create(bio_hash="old-a", bio_text="Hello,  World!", last_seen_at=now - timedelta(days=1))
+        ReaderProfile.objects.create(bio_hash="old-b", bio_text="hello world", last_seen_at=now)
+        HNOverviewArticle.objects.create(batch=first, bio_hash="old-a", article_text="older reader, batch 1")
+        HNOverviewArticle.objects.create(batch=first, bio_hash="old-b", article_text="newer reader, batch 1")
+        HNOverviewArticle.objects.create(batch=second, bio_hash="old-a", article_text="older reader, batch 2")
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        apps = executor.loader.project_state(self.migrate_to).apps
+        ReaderProfile = apps.get_model("api", "ReaderProfile")
+        HNOverviewArticle = apps.get_model("api", "HNOverviewArticle")
+
+        new_hash = hash_bio("hello world")
+        self.assertEqual(list(ReaderProfile.objects.values_list("bio_hash", "bio_text")), [(new_hash, "hello world")])
+        self.assertEqual(
+            sorted(HNOverviewArticle.objects.values_list("batch__number", "bio_hash", "article_text")),
+            [(1, new_hash, "newer reader, batch 1"), (2, new_hash, "older reader, batch 2")],
+        )
+
+
+class SummaryUniquenessMigrationTests(TransactionTestCase):
+    """0011 keeps one summary per story without losing the search triggers."""
+
+    migrate_from = [("api", "0010_job_started_at")]
+    migrate_to = [("api", "0011_summary_claims")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicate_summaries_are_dropped_and_the_index_kept(self):
+        HNStory = self.old_apps.get_model("api", "HNStory")
+        HNStorySummary = self.old_apps.get_model("api", "HNStorySummary")
+        story = HNStory.objects.create(hn_id=1, title="Story", url="https://example.com/")
+        HNStorySummary.objects.create(story=story, summary_text="older summary")
+        HNStorySummary.objects.create(story=story, summary_text="newer summary")
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        apps = executor.loader.project_state(self.migrate_to).apps
+        HNStorySummary = apps.get_model("api", "HNStorySummary")
+
+        self.assertEqual(list(HNStorySummary.objects.values_list("summary_text", flat=True)), ["newer summary"])
+        with self.assertRaises(IntegrityError):
+            HNStorySummary.objects.create(story_id=story.id, summary_text="another")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'api_hnstorysummary'")
+            self.assertEqual(len(cursor.fetchall()), 3)
+
+
+class RefreshStoryContentTests(TestCase):
+    def setUp(self):
+        self.story = HNStory.objects.create(hn_id=1, title="Story", url="https://example.com/")
+        HNStoryContent.objects.create(story=self.story, extracted_text="good text", word_count=2)
+        HNStorySummary.objects.create(story=self.story, summary_text="summary")
+
+    def _refresh(self, result):
+        with mock.patch("api.services.extract.extract_article_text", return_value=result):
+            _refresh_story_content(self.story, self.story.url)
+        self.story.refresh_from_db()
+        return HNStoryContent.objects.get(story=self.story)
+
+    def test_failed_download_keeps_previous_content_and_summaries(self):
+        content = self._refresh(("", 0, "failed to download article: ConnectTimeout"))
+
+        self.assertEqual((content.extracted_text, content.error), ("good text", None))
+        self.assertTrue(self.story.summaries.exists())
+        self.assertIsNone(self.story.fetched_at)
+
+    def test_changed_text_replaces_content_and_drops_summaries(self):
+        content = self._refresh(("new text here", 3, None))
+
+        self.assertEqual((content.extracted_text, content.word_count), ("new text here", 3))
+        self.assertFalse(self.story.summaries.exists())
+        self.assertIsNotNone(self.story.fetched_at)
+
+
+class FakeHNServer:
+    """Serves the Firebase HN endpoints the client uses from in-memory data."""
+
+    def __init__(self):
+        self.top_stories: list[int] = []
+        self.max_item = 0
+        self.updates: list[int] = []
+        self.items: dict[int, dict] = {}
+        self.requested: list[str] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.removeprefix("/v0/")
+                fake.requested.append(path)
+                if path == "topstories.json":
+                    body = fake.top_stories
+                elif path == "maxitem.json":
+                    body = fake.max_item
+                elif path == "updates.json":
+                    body = {"items": fake.updates, "profiles": []}
+                elif path.startswith("item/") and path.endswith(".json"):
+                    body = fake.items.get(int(path[len("item/") : -len(".json")]))
+                else:
+                    self.send_error(404)
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v0"
+
+    def add_story(self, item_id: int, title: str, item_type: str = "story") -> None:
+        self.items[item_id] = {
+            "id": item_id,
+            "type": item_type,
+            "title": title,
+            "url": f"https://example.com/{item_id}",
+            "score": item_id,
+        }
+
+    def requested_items(self) -> list[int]:
+        return sorted(int(path[len("item/") : -len(".json")]) for path in self.requested if path.startswith("item/"))
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class HNMirrorTests(TestCase):
+    def setUp(self):
+        self.hn = self.enterContext(FakeHNServer())
+        self.enterContext(
+            override_settings(
+                HN_API_BASE_URL=self.hn.base_url,
+                HN_TOP_CANDIDATES=2,
+                HN_MIRROR_NEW_ITEM_LIMIT=3,
+                HN_MIRROR_ITEM_MAX_AGE_SECONDS=900,
+            )
+        )
+
+    def _mirror(self, hn_id: int, title: str, age: timedelta) -> None:
+        HNItem.objects.create(hn_id=hn_id, type="story", title=title, synced_at=timezone.now() - age)
+
+    def test_resolve_items_fetches_only_missing_and_stale(self):
+        for item_id in (1, 2, 3):
+            self.hn.add_story(item_id, f"live {item_id}")
+        self._mirror(1, "mirrored 1", timedelta(minutes=1))
+        self._mirror(2, "mirrored 2", timedelta(hours=1))
+
+        items = resolve_items([3, 1, 2])
+
+        self.assertEqual([item["title"] for item in items], ["live 3", "mirrored 1", "live 2"])
+        self.assertEqual(self.hn.requested_items(), [2, 3])
+        self.assertEqual(
+            dict(HNItem.objects.values_list("hn_id", "title")),
+            {1: "mirrored 1", 2: "live 2", 3: "live 3"},
+        )
+
+    def test_sync_mirror_advances_the_max_item_cursor(self):
+        for item_id in range(1, 11):
+            self.hn.add_story(item_id, f"story {item_id}")
+        self.hn.top_stories = [10, 9, 8]
+        self.hn.max_item = 10
+
+        # The first sync only records the cursor; it never backfills history.
+        report = sync_mirror()
+        self.assertEqual(report, {"refreshed": 2, "new_items": 0, "max_item": 10})
+        self.assertEqual(self.hn.requested_items(), [9, 10])
+        self.assertEqual(HNSyncState.load().max_item, 10)
+
+        self.hn.requested.clear()
+        self.hn.add_story(11, "story 11")
+        self.hn.add_story(12, "a comment", item_type="comment")
+        self.hn.max_item = 12
+        # Changed items are refreshed only if mirrored; 1 never was.
+        self.hn.updates = [1, 9]
+        self.hn.add_story(9, "story 9 edited")
+
+        report = sync_mirror()
+        self.assertEqual(report, {"refreshed": 2, "new_items": 1, "max_item": 12})
+        self.assertEqual(self.hn.requested_items(), [9, 10, 11, 12])
+        self.assertEqual(HNSyncState.load().max_item, 12)
+        self.assertEqual(
+            dict(HNItem.objects.values_list("hn_id", "title")),
+            {9: "story 9 edited", 10: "story 10", 11: "story 11"},
+        )
+
+    def test_sync_mirror_caps_new_items_after_a_long_gap(self):
+        HNSyncState.objects.create(pk=1, max_item=1)
+        for item_id in range(1, 21):
+            self.hn.add_story(item_id, f"story {item_id}")
+        self.hn.max_item = 20
+
+        report = sync_mirror()
+
+        self.assertEqual(report["new_items"], 3)
+        self.assertEqual(self.hn.requested_items(), [18, 19, 20])
+        self.assertEqual(HNSyncState.load().max_item, 20)
+
+
+@override_settings(JOB_STALE_MINUTES=60)
+class StaleJobTests(TestCase):
+    def _job(self, status: str, age: timedelta) -> Job:
+        job = Job.objects.create(kind=Job.Kind.FETCH_BATCH, status=status)
+        Job.objects.filter(id=job.id).update(updated_at=timezone.now() - age)
+        return job
+
+    def test_abandoned_job_does_not_count_as_in_flight(self):
+        self._job(Job.Status.QUEUED, timedelta(hours=2))
+        self.assertFalse(_user_jobs_in_flight())
+
+        self._job(Job.Status.RUNNING, timedelta(minutes=5))
+        self.assertTrue(_user_jobs_in_flight())
+
+    def test_retention_marks_abandoned_jobs_as_error(self):
+        abandoned = self._job(Job.Status.RUNNING, timedelta(hours=2))
+        live = self._job(Job.Status.QUEUED, timedelta(minutes=5))
+        finished = self._job(Job.Status.COMPLETE, timedelta(hours=2))
+
+        report = run_retention(get_policy(), compact=False)
+
+        self.assertEqual(report["stale_jobs_failed"], 1)
+        statuses = dict(Job.objects.values_list("id", "status"))
+        self.assertEqual(
+            statuses,
+            {abandoned.id: Job.Status.ERROR, live.id: Job.Status.QUEUED, finished.id: Job.Status.COMPLETE},
+        )
+
+
+class AnalyzeRequestTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        HNBatch.objects.create(number=1)
+
+    def test_bad_batch_number_is_rejected_before_any_write(self):
+        live = Job.objects.create(kind=Job.Kind.ANALYZE_BATCH, status=Job.Status.RUNNING, client_id="c1")
+
+        for batch_number, status in (("abc", 400), (99, 404)):
+            payload = {"bio": "x", "batch_number": batch_number, "client_id": "c1"}
+            resp = self.client.post("/api/jobs/analyze/", payload, format="json")
+            self.assertEqual(resp.status_code, status, batch_number)
+
+        self.assertEqual(Job.objects.get(id=live.id).status, Job.Status.RUNNING)
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertFalse(ReaderProfile.objects.exists())
+
+    def test_save_profile_false_is_honored_for_form_and_json_bodies(self):
+        with mock.patch("api.views.enqueue_job"):
+            for payload, fmt in (
+                ({"bio": "x", "save_profile": "false"}, None),
+                ({"bio": "x", "save_profile": "0"}, "json"),
+                ({"bio": "x", "save_profile": False}, "json"),
+            ):
+                resp = self.client.post("/api/jobs/analyze/", payload, format=fmt)
+                self.assertEqual(resp.status_code, 200, payload)
+            self.assertFalse(ReaderProfile.objects.exists())
+
+            resp = self.client.post("/api/jobs/analyze/", {"bio": "x", "save_profile": "true"})
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(ReaderProfile.objects.exists())
+
+    def test_non_boolean_save_profile_is_rejected(self):
+        resp = self.client.post("/api/jobs/analyze/", {"bio": "x", "save_profile": "maybe"}, format="json")
+
+        self.assertEqual((resp.status_code, resp.json()), (400, {"error": "save_profile must be a boolean"}))
+        self.assertFalse(Job.objects.exists())
+
+    def test_force_is_parsed_as_a_boolean(self):
+        with mock.patch("api.views.enqueue_job") as enqueue:
+            for value, expected in (("false", False), ("0", False), ("true", True), (True, True)):
+                resp = self.client.post("/api/jobs/analyze/", {"bio": "x", "force": value}, format="json")
+                self.assertEqual(resp.status_code, 200, value)
+                self.assertIs(enqueue.call_args.args[4], expected, value)
+
+        resp = self.client.post("/api/jobs/analyze/", {"bio": "x", "force": "always"}, format="json")
+        self.assertEqual((resp.status_code, resp.json()), (400, {"error": "force must be a boolean"}))
+
+
+class FetchBatchTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(kind=Job.Kind.FETCH_BATCH, status=Job.Status.RUNNING)
+        self.picked = [
+            {"id": item_id, "title": f"Story {item_id}", "url": f"https://example.com/{item_id}"}
+            for item_id in (1, 2, 3)
+        ]
+
+    def _extract(self, url):
+        if url.endswith("/2"):
+            Job.objects.filter(id=self.job.id).update(status=Job.Status.CANCELLED)
+        return "some text", 2, None
+
+    def test_batch_is_published_only_when_complete(self):
+        with mock.patch("api.services.extract.extract_article_text", return_value=("some text", 2, None)):
+            batch = _fetch_batch(self.job, self.picked)
+
+        self.assertEqual(list(batch.memberships.order_by("rank").values_list("story__hn_id", flat=True)), [1, 2, 3])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.batch_id, batch.id)
+
+    def test_cancelled_fetch_leaves_no_batch(self):
+        with mock.patch("api.services.extract.extract_article_text", side_effect=self._extract):
+            with self.assertRaises(JobCancelled):
+                _fetch_batch(self.job, self.picked)
+
+        self.assertFalse(HNBatch.objects.exists())
+
+    def test_story_created_by_another_fetch_is_reused(self):
+        def extract(url):
+            if url.endswith("/1"):
+                HNStory.objects.create(hn_id=2, title="Story 2", url="https://example.com/2")
+            return "some text", 2, None
+
+        with mock.patch("api.services.extract.extract_article_text", side_effect=extract):
+            batch = _fetch_batch(self.job, self.picked)
+
+        self.assertEqual(HNStory.objects.filter(hn_id=2).count(), 1)
+        self.assertEqual(batch.memberships.count(), 3)
+
+    def test_fetch_waits_while_another_fetch_holds_the_lock(self):
+        self.job.status = Job.Status.QUEUED
+        self.job.save()
+        with fetch_lock, mock.patch("api.tasks._fetch_batch") as fetch, self.assertRaises(RetryTask):
+            fetch_batch_job.call_local(self.job.id)
+
+        fetch.assert_not_called()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.message), (Job.Status.QUEUED, "Waiting for another fetch"))
+        self.assertFalse(fetch_lock.is_locked())
+
+
+class AsyncViewParityTests(TestCase):
+    """The async endpoints serve byte-for-byte the payloads of their DRF twins."""
+
+    def setUp(self):
+        self.client = APIClient()
+        story = HNStory.objects.create(hn_id=1, title="Story", url="https://example.com/")
+        HNStorySummary.objects.create(story=story, summary_text="summary")
+        batch = HNBatch.objects.create(number=1)
+        batch.memberships.create(story=story, rank=1)
+        batch.overviews.create(bio_hash="a" * 64, article_text="overview")
+        self.job = Job.objects.create(kind=Job.Kind.FETCH_BATCH, batch=batch)
+
+    def assertSamePayload(self, path):
+        sync = self.client.get(f"/api/{path}")
+        async_ = self.client.get(f"/api/async/{path}")
+        self.assertEqual((async_.status_code, async_.json()), (sync.status_code, sync.json()), path)
+
+    def test_payloads_match(self):
+        for path in (
+            f"jobs/{self.job.id}/",
+            "batches/latest/",
+            f"batches/latest/?bio_hash={'a' * 64}",
+            "batches/1/",
+            "jobs/999/",
+            "batches/999/",
+        ):
+            self.assertSamePayload(path)
+
+
+class TrickleHandler(BaseHTTPRequestHandler):
+    """An HTML page sent a few bytes at a time, each within the read timeout."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        try:
+            for _ in range(20):
+                self.wfile.write(b"<p>slow</p>")
+                self.wfile.flush()
+                time.sleep(0.05)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up at its deadline, as intended
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ArticleDownloadTests(TestCase):
+    def test_malformed_urls_return_an_error(self):
+        for url in ("http://[::1", f"http://{'a' * 64}.example.com/"):
+            text, word_count, error = extract_article_text(url)
+            self.assertEqual((text, word_count), ("", 0))
+            self.assertIn("invalid URL", error)
+
+    @override_settings(ARTICLE_DEADLINE_SECONDS=0.3, ARTICLE_TIMEOUT_SECONDS=5)
+    def test_trickling_download_stops_at_the_deadline(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), TrickleHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        started = time.monotonic()
+        body, truncated, error = download_html(f"http://127.0.0.1:{server.server_port}/")
+
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertIsNone(body)
+        self.assertIn("took over 0.3s", error)
+
+
+class SummaryGraphTests(TestCase):
+    def setUp(self):
+        batch = HNBatch.objects.create(number=1)
+        for rank in (1, 2, 3):
+            story = HNStory.objects.create(hn_id=rank, title=f"Story {rank}", url=f"https://example.com/{rank}")
+            HNStoryContent.objects.create(story=story, extracted_text="text", word_count=1)
+            batch.memberships.create(story=story, rank=rank)
+
+    @staticmethod
+    async def _summarize(model, payload):
+        if payload["title"] == "Story 1":
+            raise RuntimeError("rate limited")
+        await asyncio.sleep(0.05)  # still running when the first story fails
+        return {"story_id": payload["id"], "title": payload["title"], "url": payload["url"], "summary": "ok"}
+
+    def test_one_failed_story_keeps_the_others(self):
+        from api.services import analysis_graph
+
+        saved = []
+        with (
+            mock.patch.object(analysis_graph, "_get_models", return_value=(None, None)),
+            mock.patch.object(analysis_graph, "_summarize_story", self._summarize),
+        ):
+            with self.assertRaisesMessage(RuntimeError, "1 summaries failed; first: story"):
+                analysis_graph.run_summary_analysis(1, concurrency=3, on_summary=saved.append)
+
+        self.assertEqual(sorted(summary["title"] for summary in saved), ["Story 2", "Story 3"])
+
+    def test_resume_reruns_only_unfinished_stories(self):
+        from api.services import analysis_graph
+
+        calls = []
+
+        async def summarize(model, payload):
+            calls.append(payload["title"])
+            return {"story_id": payload["id"], "title": payload["title"], "url": payload["url"], "summary": "ok"}
+
+        def crash_on_story_2():
+            if calls == ["Story 1"]:
+                raise JobCancelled()
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            override_settings(LANGGRAPH_CHECKPOINT_DB=f"{tmp}/checkpoints.db"),
+            mock.patch.object(analysis_graph, "_get_models", return_value=(None, None)),
+            mock.patch.object(analysis_graph, "_summarize_story", summarize),
+        ):
+            thread_id = analysis_graph.checkpoint_thread_id(7)
+            with self.assertRaises(JobCancelled):
+                analysis_graph.run_summary_analysis(1, concurrency=1, check_cancelled=crash_on_story_2, thread_id=thread_id)
+            self.assertEqual(calls, ["Story 1"])
+            self.assertGreater(self._checkpoint_count(f"{tmp}/checkpoints.db", thread_id), 0)
+
+            result = analysis_graph.run_summary_analysis(1, concurrency=1, thread_id=thread_id)
+
+            self.assertEqual(calls, ["Story 1", "Story 2", "Story 3"])
+            self.assertEqual(sorted(summary["title"] for summary in result["summaries"]), ["Story 1", "Story 2", "Story 3"])
+            self.assertEqual(self._checkpoint_count(f"{tmp}/checkpoints.db", thread_id), 0)
+
+    @staticmethod
+    def _checkpoint_count(path, thread_id):
+        with sqlite3.connect(path) as db:
+            return db.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+
+
+class PrewarmSummariesTests(TestCase):
+    def test_defers_to_a_user_job_that_arrived_while_queued(self):
+        batch = HNBatch.objects.create(number=1)
+        job = Job.objects.create(kind=Job.Kind.PREWARM, status=Job.Status.QUEUED, batch=batch)
+        Job.objects.create(kind=Job.Kind.ANALYZE_BATCH, status=Job.Status.RUNNING)
+
+        with mock.patch("api.tasks._ensure_summaries") as ensure_summaries:
+            prewarm_summaries_job.call_local(job.id)
+
+        ensure_summaries.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.message), (Job.Status.COMPLETE, "Deferred summaries to a user job"))
+
+
+@override_settings(PREWARM_ENABLED=True)
+class PrewarmBatchTests(TestCase):
+    def setUp(self):
+        self.batch = HNBatch.objects.create(number=1)
+        self.picked = []
+        for rank in (1, 2):
+            story = HNStory.objects.create(hn_id=rank, title=f"Story {rank}", url=f"https://example.com/{rank}")
+            self.batch.memberships.create(story=story, rank=rank)
+            HNStorySummary.objects.create(story=story, summary_text="summary")
+            self.picked.append({"id": rank, "title": story.title, "url": story.url})
+
+    def _run(self):
+        with (
+            mock.patch("api.tasks._pick_top_stories", return_value=self.picked),
+            mock.patch("api.tasks.enqueue_job") as enqueue,
+        ):
+            prewarm_batch_job.call_local()
+        return enqueue
+
+    def test_unchanged_and_summarized_batch_is_left_alone(self):
+        enqueue = self._run()
+
+        enqueue.assert_not_called()
+        self.assertFalse(Job.objects.exists())
+
+    def test_unchanged_batch_missing_a_summary_is_warmed(self):
+        HNStorySummary.objects.filter(story__hn_id=2).delete()
+
+        enqueue = self._run()
+
+        job = Job.objects.get(kind=Job.Kind.PREWARM)
+        self.assertEqual((job.batch_id, job.status), (self.batch.id, Job.Status.QUEUED))
+        enqueue.assert_called_once_with(prewarm_summaries_job, job)
+
+    @override_settings(PREWARM_MIN_NEW_STORIES=1)
+    def test_fetch_stage_skips_while_another_fetch_holds_the_lock(self):
+        self.picked.append({"id": 3, "title": "Story 3", "url": "https://example.com/3"})
+
+        with fetch_lock, mock.patch("api.tasks._fetch_batch") as fetch:
+            enqueue = self._run()
+
+        fetch.assert_not_called()
+        enqueue.assert_not_called()
+        job = Job.objects.get(kind=Job.Kind.PREWARM)
+        self.assertEqual((job.status, job.message), (Job.Status.COMPLETE, "Skipped: another fetch is running"))
+
+
+class AnalyzeFanoutTests(TestCase):
+    """The profile fan-out follows batch state, whichever attempt finished the summaries."""
+
+    def setUp(self):
+        self.batch = HNBatch.objects.create(number=1)
+        for rank in (1, 2):
+            story = HNStory.objects.create(hn_id=rank, title=f"Story {rank}", url=f"https://example.com/{rank}")
+            HNStoryContent.objects.create(story=story, extracted_text="text", word_count=1)
+            self.batch.memberships.create(story=story, rank=rank)
+
+    @staticmethod
+    def _summarize(batch_number, on_summary=None, **kwargs):
+        for story in HNStory.objects.filter(memberships__batch__number=batch_number, summaries__isnull=True):
+            on_summary({"story_id": story.id, "summary": "summary"})
+        return {"summaries": []}
+
+    def _analyze(self, job, overview):
+        with (
+            mock.patch("api.services.analysis_graph.run_summary_analysis", self._summarize),
+            mock.patch("api.services.analysis_graph.run_overview_generation", side_effect=overview),
+            mock.patch("api.tasks.enqueue_job") as enqueue,
+        ):
+            analyze_batch_job.call_local(job.id, 1, "a reader bio")
+        return enqueue
+
+    def test_retry_after_overview_failure_queues_the_fanout(self):
+        job = Job.objects.create(kind=Job.Kind.ANALYZE_BATCH)
+
+        enqueue = self._analyze(job, RuntimeError("overview failed"))
+        enqueue.assert_not_called()
+        self.assertEqual(HNStorySummary.objects.count(), 2)
+
+        # The retry finds every summary already saved.
+        enqueue = self._analyze(job, ["overview"])
+        fanout = Job.objects.get(kind=Job.Kind.OVERVIEW_FANOUT)
+        self.assertEqual(fanout.batch_id, self.batch.id)
+        enqueue.assert_called_once_with(fanout_overviews_job, fanout)
+
+    def test_fanout_is_queued_once_per_batch(self):
+        for _ in range(2):
+            self._analyze(Job.objects.create(kind=Job.Kind.ANALYZE_BATCH), ["overview"])
+
+        self.assertEqual(Job.objects.filter(kind=Job.Kind.OVERVIEW_FANOUT).count(), 1)
+
+
+class BatchListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for number in range(1, 6):
+            batch = HNBatch.objects.create(number=number)
+            for rank in (1, 2, 3):
+                hn_id = number * 10 + rank
+                story = HNStory.objects.create(hn_id=hn_id, title=f"Story {hn_id}", url=f"https://example.com/{hn_id}")
+                HNStoryContent.objects.create(story=story, extracted_text="text", word_count=1)
+                HNStorySummary.objects.create(story=story, summary_text=f"summary {hn_id}")
+                batch.memberships.create(story=story, rank=rank)
+            batch.overviews.create(bio_hash="a" * 64, article_text=f"overview {number}")
+            batch.overviews.create(bio_hash="b" * 64, article_text=f"overview {number}")
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        # One query for the page, plus one per section (summaries need the memberships).
+        for include, queries in (("", 1), ("stories", 2), ("summaries", 3), ("stories,summaries,overviews", 4)):
+            for limit in (1, 2, 5):
+                with self.subTest(include=include, limit=limit), self.assertNumQueries(queries):
+                    resp = self.client.get("/api/batches/", {"limit": limit, "include": include})
+                self.assertEqual(len(resp.json()["results"]), limit)
+
+    def test_sections_and_fields(self):
+        resp = self.client.get("/api/batches/", {"limit": 1, "include": "stories,summaries,overviews"})
+        batch = resp.json()["results"][0]
+        self.assertEqual(batch["batch_number"], 5)
+        self.assertEqual([story["title"] for story in batch["stories"]], ["Story 51", "Story 52", "Story 53"])
+        self.assertEqual(len(batch["summaries"]), 3)
+        self.assertEqual(len(batch["overviews"]), 2)
+
+        resp = self.client.get("/api/batches/", {"limit": 1, "fields": "batch_number"})
+        self.assertEqual(resp.json()["results"], [{"batch_number": 5}])
+
+    def test_cursor_pages_through_every_batch_once(self):
+        numbers, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = self.client.get("/api/batches/", params).json()
+            numbers += [batch["batch_number"] for batch in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(numbers, [5, 4, 3, 2, 1])
+
+    def test_unknown_fields_and_bad_cursor_are_rejected(self):
+        resp = self.client.get("/api/batches/", {"fields": "batch_number,secrets"})
+        self.assertEqual((resp.status_code, resp.json()), (400, {"error": "unknown fields: secrets"}))
+
+        resp = self.client.get("/api/batches/", {"cursor": "abc"})
+        self.assertEqual(resp.status_code, 400)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.batch = HNBatch.objects.create(number=1)
+        self.story = HNStory.objects.create(hn_id=1, title="Quantum widgets", url="https://example.com/1")
+        self.batch.memberships.create(story=self.story, rank=1)
+
+    @staticmethod
+    def _hits(text, kind="story"):
+        return [result[f"{kind}_id"] for result in search(text, kinds={kind})["results"]]
+
+    def test_triggers_exist(self):
+        triggers = import_module("api.migrations.0008_search_index").TRIGGERS
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            names = {row[0] for row in cursor.fetchall()}
+        self.assertLessEqual(set(triggers), names)
+
+    def test_story_row_follows_title_content_and_summary_writes(self):
+        self.assertEqual(self._hits("widgets"), [self.story.id])
+        self.story.title = "Classical gadgets"
+        self.story.save()
+        self.assertEqual((self._hits("widgets"), self._hits("gadgets")), ([], [self.story.id]))
+
+        content = HNStoryContent.objects.create(story=self.story, extracted_text="photosynthesis explained")
+        self.assertEqual(self._hits("photosynthesis"), [self.story.id])
+        content.extracted_text = "chlorophyll explained"
+        content.save()
+        self.assertEqual((self._hits("photosynthesis"), self._hits("chlorophyll")), ([], [self.story.id]))
+        content.delete()
+        self.assertEqual(self._hits("chlorophyll"), [])
+
+        summary = HNStorySummary.objects.create(story=self.story, summary_text="zeppelins return")
+        self.assertEqual(self._hits("zeppelins"), [self.story.id])
+        summary.summary_text = "blimps return"
+        summary.save()
+        self.assertEqual((self._hits("zeppelins"), self._hits("blimps")), ([], [self.story.id]))
+        summary.delete()
+        self.assertEqual(self._hits("blimps"), [])
+
+        self.story.delete()
+        self.assertEqual(self._hits("gadgets"), [])
+
+    def test_overview_row_follows_writes(self):
+        overview = self.batch.overviews.create(bio_hash="a" * 64, article_text="a letter about lighthouses")
+        self.assertEqual(self._hits("lighthouses", "overview"), [overview.id])
+        overview.article_text = "a letter about harbours"
+        overview.save()
+        self.assertEqual(self._hits("lighthouses", "overview"), [])
+        self.assertEqual(self._hits("harbours", "overview"), [overview.id])
+        self.assertEqual(search("harbours", kinds={"overview"}, bio_hash="b" * 64)["results"], [])
+        overview.delete()
+        self.assertEqual(self._hits("harbours", "overview"), [])
+
+    def test_endpoint_pages_and_filters(self):
+        for hn_id in range(2, 6):
+            story = HNStory.objects.create(hn_id=hn_id, title=f"Quantum story {hn_id}", url=f"https://example.com/{hn_id}")
+            self.batch.memberships.create(story=story, rank=hn_id)
+        self.batch.overviews.create(bio_hash="a" * 64, article_text="quantum everything")
+
+        seen, cursor = [], None
+        while True:
+            params = {"q": "quantum", "limit": 2, "type": "story", **({"cursor": cursor} if cursor else {})}
+            page = self.client.get("/api/search/", params).json()
+            seen += [result["story_id"] for result in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), sorted(HNStory.objects.values_list("id", flat=True)))
+
+        resp = self.client.get("/api/search/", {"q": "quantum", "type": "overview"})
+        self.assertEqual([result["type"] for result in resp.json()["results"]], ["overview"])
+        self.assertEqual(resp.json()["results"][0]["batch_number"], 1)
+
+        self.assertEqual(self.client.get("/api/search/").status_code, 400)
+        resp = self.client.get("/api/search/", {"q": "quantum", "type": "story,comment"})
+        self.assertEqual((resp.status_code, resp.json()), (400, {"error": "unknown types: comment"}))
+
+    def test_rebuild_command_restores_a_lost_index(self):
+        HNStorySummary.objects.create(story=self.story, summary_text="zeppelins return")
+        self.batch.overviews.create(bio_hash="a" * 64, article_text="a letter about lighthouses")
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM api_story_fts")
+            cursor.execute("DELETE FROM api_overview_fts")
+        self.assertEqual(self._hits("zeppelins"), [])
+
+        out = io.StringIO()
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertIn("Indexed 1 stories and 1 overviews", out.getvalue())
+        self.assertEqual(self._hits("zeppelins"), [self.story.id])
+        self.assertEqual(len(self._hits("lighthouses", "overview")), 1)
+
+
+class BioTests(TestCase):
+    def test_cosmetic_edits_keep_the_hash(self):
+        self.assertEqual(normalize_bio("  I build\tcompilers -- and   ＲＵＳＴ tools! "), "i build compilers and rust tools")
+        self.assertEqual(hash_bio("I build compilers, and Rust tools."), hash_bio("i build compilers and rust tools"))
+        self.assertNotEqual(hash_bio("I build compilers"), hash_bio("I build databases"))
+
+    def test_similar_overview_respects_the_threshold(self):
+        batch = HNBatch.objects.create(number=1)
+        stored = "backend engineer who writes rust and go and likes databases distributed systems and compilers"
+        overview = batch.overviews.create(bio_hash=hash_bio(stored), bio_signature=bio_signature(stored), article_text="x")
+        near = bio_signature(stored + " too")
+        similarity = estimate_similarity(near, bio_signature(stored))
+
+        self.assertEqual(find_similar_overview(batch, near, threshold=similarity), (overview, similarity))
+        self.assertIsNone(find_similar_overview(batch, near, threshold=similarity + 0.01))
+        self.assertIsNone(find_similar_overview(batch, bio_signature("gardener who loves roses and tomatoes")))
+
+
+class AnalyzeReuseTests(TestCase):
+    bio = "backend engineer who writes rust and go and likes databases distributed systems and compilers"
+
+    def setUp(self):
+        self.batch = HNBatch.objects.create(number=1)
+        self.source = self.batch.overviews.create(
+            bio_hash=hash_bio(self.bio), bio_signature=bio_signature(self.bio), article_text="shared overview"
+        )
+
+    def _analyze(self, bio_text, force=False):
+        job = Job.objects.create(kind=Job.Kind.ANALYZE_BATCH)
+        with (
+            mock.patch("api.services.analysis_graph.run_overview_generation", return_value="fresh overview") as generate,
+            mock.patch("api.tasks.enqueue_job"),
+        ):
+            analyze_batch_job.call_local(job.id, 1, bio_text, force)
+        job.refresh_from_db()
+        return job, generate
+
+    def test_near_duplicate_bio_reuses_the_overview(self):
+        job, generate = self._analyze(self.bio + " too")
+
+        generate.assert_not_called()
+        self.assertTrue(job.message.startswith("Reused an existing overview"), job.message)
+        overview = self.batch.overviews.get(bio_hash=hash_bio(self.bio + " too"))
+        self.assertEqual((overview.article_text, overview.reused_from_id), ("shared overview", self.source.id))
+
+    def test_unrelated_bio_gets_a_new_overview(self):
+        _, generate = self._analyze("gardener who loves roses and tomatoes")
+
+        generate.assert_called_once()
+
+    def test_force_bypasses_reuse(self):
+        job, generate = self._analyze(self.bio, force=True)
+
+        generate.assert_called_once()
+        self.assertEqual(job.status, Job.Status.COMPLETE)
+        self.source.refresh_from_db()
+        self.assertEqual((self.source.article_text, self.source.reused_from_id), ("fresh overview", None))
+
+
+class SummaryClaimTests(TestCase):
+    """One job per batch generates summaries; the others wait for it or leave it be."""
+
+    def setUp(self):
+        self.batch = HNBatch.objects.create(number=1)
+        for rank in (1, 2):
+            story = HNStory.objects.create(hn_id=rank, title=f"Story {rank}", url=f"https://example.com/{rank}")
+            HNStoryContent.objects.create(story=story, extracted_text="text", word_count=1)
+            self.batch.memberships.create(story=story, rank=rank)
+
+    def _claim(self, kind, status):
+        holder = Job.objects.create(kind=kind, status=status, batch=self.batch)
+        SummaryClaim.objects.create(batch=self.batch, job=holder)
+        return holder
+
+    def _analyze(self, job):
+        with (
+            mock.patch("api.services.analysis_graph.run_summary_analysis", AnalyzeFanoutTests._summarize) as summarize,
+            mock.patch("api.services.analysis_graph.run_overview_generation", return_value="overview"),
+            mock.patch("api.tasks.enqueue_job"),
+        ):
+            analyze_batch_job.call_local(job.id, 1, "a reader bio")
+        return summarize
+
+    def test_analyze_waits_for_a_running_prewarm(self):
+        holder = self._claim(Job.Kind.PREWARM, Job.Status.RUNNING)
+        job = Job.objects.create(kind=Job.Kind.ANALYZE_BATCH)
+
+        with self.assertRaises(RetryTask):
+            self._analyze(job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.message), (Job.Status.QUEUED, f"Waiting for summaries from job {holder.id}"))
+        self.assertFalse(HNStorySummary.objects.exists())
+        self.assertEqual(SummaryClaim.objects.get().job_id, holder.id)
+
+    def test_claim_of_a_finished_job_is_taken_over_and_released(self):
+        self._claim(Job.Kind.ANALYZE_BATCH, Job.Status.ERROR)
+        job = Job.objects.create(kind=Job.Kind.ANALYZE_BATCH)
+
+        self._analyze(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.COMPLETE)
+        self.assertEqual(HNStorySummary.objects.count(), 2)
+        self.assertFalse(SummaryClaim.objects.exists())
+
+    def test_prewarm_leaves_a_claimed_batch_to_its_holder(self):
+        holder = self._claim(Job.Kind.PREWARM, Job.Status.RUNNING)
+        job = Job.objects.create(kind=Job.Kind.PREWARM, status=Job.Status.QUEUED, batch=self.batch)
+
+        with mock.patch("api.services.analysis_graph.run_summary_analysis") as summarize:
+            prewarm_summaries_job.call_local(job.id)
+
+        summarize.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.message), (Job.Status.COMPLETE, f"Deferred summaries to job {holder.id}"))
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path("hello/", views.hello),
@@ -7,6 +7,13 @@ urlpatterns = [
     path("jobs/fetch-batch/", views.create_fetch_batch_job),
     path("jobs/analyze/", views.create_analyze_batch_job),
     path("jobs/<int:job_id>/", views.get_job),
+    path("jobs/<int:job_id>/cancel/", views.cancel_job),
+    path("queues/", views.get_queue_stats),
+    path("batches/", views.list_batches),
     path("batches/latest/", views.get_latest_batch),
     path("batches/<int:number>/", views.get_batch),
+    path("search/", views.search),
+    path("async/jobs/<int:job_id>/", async_views.get_job),
+    path("async/batches/latest/", async_views.get_latest_batch),
+    path("async/batches/<int:number>/", async_views.get_batch),
 ]
@@ -1,12 +1,22 @@
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
+from rest_framework import serializers
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from .langgraph_demo import run_demo
-from .models import HNBatch, HNStorySummary, Job
-from .tasks import analyze_batch_job, fetch_batch_job
+from .models import HNBatch, Job
+from .serializers import (
+    BATCH_LIST_FIELDS,
+    HEADER_FIELDS,
+    serialize_batch,
+    serialize_batch_page,
+    serialize_job,
+)
+from .services.profiles import hash_bio, normalize_bio, save_profile, touch_profile
+from .services.queue_metrics import queue_stats
+from .services.search import SEARCH_KINDS, search as search_index
+from .tasks import analyze_batch_job, enqueue_job, fetch_batch_job, request_cancel, supersede_jobs
 
 
 @api_view(["GET"])
@@ -16,102 +26,128 @@ def hello(request):
 
 @api_view(["GET"])
 def run_langgraph_demo(request):
+    from .langgraph_demo import run_demo  # keeps langgraph out of web startup
+
     q = request.query_params.get("q", "hi")
     return Response({"result": run_demo(q)})
 
 
-def _serialize_batch(batch: HNBatch, bio_hash: str | None = None) -> dict:
-    stories = (
-        batch.stories.select_related("content")
-        .all()
-        .order_by("rank")
-    )
-    overview = None
-    if bio_hash:
-        overview = batch.overviews.filter(bio_hash=bio_hash).order_by("-created_at").first()
-    else:
-        overview = batch.overviews.order_by("-created_at").first()
-
-    summaries_qs = HNStorySummary.objects.filter(story__batch=batch)
-    summary_map = {summary.story_id: summary.summary_text for summary in summaries_qs}
-
-    return {
-        "batch_number": batch.number,
-        "created_at": batch.created_at,
-        "bio_hash": bio_hash,
-        "stories": [
-            {
-                "id": story.id,
-                "rank": story.rank,
-                "title": story.title,
-                "url": story.url,
-                "content_error": getattr(story.content, "error", None),
-            }
-            for story in stories
-        ],
-        "summaries": [
-            {
-                "story_id": story.id,
-                "summary_text": summary_map.get(story.id),
-            }
-            for story in stories
-            if story.id in summary_map
-        ],
-        "overview": (
-            {
-                "bio_hash": overview.bio_hash,
-                "article_text": overview.article_text,
-                "created_at": overview.created_at,
-            }
-            if overview
-            else None
-        ),
-    }
-
-
 @csrf_exempt
 @api_view(["POST"])
 @authentication_classes([])
 @permission_classes([AllowAny])
 def create_fetch_batch_job(request):
     job = Job.objects.create(kind=Job.Kind.FETCH_BATCH, status=Job.Status.QUEUED)
-    fetch_batch_job(job.id)
+    enqueue_job(fetch_batch_job, job)
     return Response({"job_id": job.id})
 
 
+def _bool_field(request, name: str, default: bool) -> bool:
+    """Parse a boolean body field the way DRF does: "false", "0" and "off" are false."""
+    try:
+        return serializers.BooleanField().to_internal_value(request.data.get(name, default))
+    except serializers.ValidationError:
+        raise ValueError(f"{name} must be a boolean") from None
+
+
 @csrf_exempt
 @api_view(["POST"])
 @authentication_classes([])
 @permission_classes([AllowAny])
 def create_analyze_batch_job(request):
     bio_text = request.data.get("bio", "")
-    if not bio_text:
+    if not normalize_bio(bio_text):
         return Response({"error": "bio is required"}, status=400)
 
+    # Validate everything before writing: a bad request must not save a
+    # profile, supersede the client's live job or leave a job behind.
     batch_number = request.data.get("batch_number")
     if batch_number is None:
         latest = HNBatch.objects.order_by("-number").first()
         if not latest:
             return Response({"error": "no batches yet"}, status=400)
         batch_number = latest.number
+    else:
+        try:
+            batch_number = int(batch_number)
+        except (TypeError, ValueError):
+            return Response({"error": "batch_number must be an integer"}, status=400)
+        if not HNBatch.objects.filter(number=batch_number).exists():
+            return Response({"error": f"batch {batch_number} not found"}, status=404)
+    try:
+        keep_profile = _bool_field(request, "save_profile", True)
+        force = _bool_field(request, "force", False)
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=400)
+
+    if keep_profile:
+        save_profile(bio_text)
+
+    client_id = request.data.get("client_id") or request.headers.get("X-Client-Id", "")
+    job = Job.objects.create(
+        kind=Job.Kind.ANALYZE_BATCH,
+        status=Job.Status.QUEUED,
+        client_id=str(client_id)[:64],
+    )
+    superseded = supersede_jobs(job)
+    enqueue_job(analyze_batch_job, job, batch_number, bio_text, force)
+    return Response({"job_id": job.id, "bio_hash": hash_bio(bio_text), "superseded": superseded})
 
-    job = Job.objects.create(kind=Job.Kind.ANALYZE_BATCH, status=Job.Status.QUEUED)
-    analyze_batch_job(job.id, int(batch_number), bio_text)
-    return Response({"job_id": job.id})
+
+@csrf_exempt
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def cancel_job(request, job_id: int):
+    job = get_object_or_404(Job, id=job_id)
+    if not request_cancel(job):
+        return Response({"error": f"job already {job.status.lower()}"}, status=409)
+    return Response({"job_id": job.id, "status": Job.Status.CANCELLED})
 
 
 @api_view(["GET"])
 def get_job(request, job_id: int):
-    job = get_object_or_404(Job, id=job_id)
+    job = get_object_or_404(Job.objects.select_related("batch"), id=job_id)
+    return Response(serialize_job(job))
+
+
+def _csv_param(request, name: str) -> set[str]:
+    raw = request.query_params.get(name, "")
+    return {part.strip() for part in raw.split(",") if part.strip()}
+
+
+@api_view(["GET"])
+def list_batches(request):
+    """Newest-first batch history with keyset pagination on `number`.
+
+    `cursor` is the `next_cursor` of the previous page. `fields` picks the
+    exact keys per batch; `include` adds sections to the default header
+    fields. Sections: stories, summaries, overviews.
+    """
+    try:
+        limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        cursor = request.query_params.get("cursor")
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        return Response({"error": "cursor and limit must be integers"}, status=400)
+
+    fields = _csv_param(request, "fields") or set(HEADER_FIELDS)
+    fields |= _csv_param(request, "include")
+    unknown = fields - set(BATCH_LIST_FIELDS)
+    if unknown:
+        return Response({"error": f"unknown fields: {', '.join(sorted(unknown))}"}, status=400)
+
+    batches = HNBatch.objects.order_by("-number")
+    if cursor is not None:
+        batches = batches.filter(number__lt=cursor)
+    page = list(batches[: limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
     return Response(
         {
-            "job_id": job.id,
-            "status": job.status,
-            "progress_current": job.progress_current,
-            "progress_total": job.progress_total,
-            "message": job.message,
-            "error": job.error,
-            "batch_number": job.batch.number if job.batch else None,
+            "results": serialize_batch_page(page, fields, request.query_params.get("bio_hash")),
+            "next_cursor": page[-1].number if has_more else None,
         }
     )
 
@@ -122,11 +158,54 @@ def get_latest_batch(request):
     if not batch:
         return Response({"error": "no batches yet"}, status=404)
     bio_hash = request.query_params.get("bio_hash")
-    return Response(_serialize_batch(batch, bio_hash))
+    if bio_hash:
+        touch_profile(bio_hash)
+    return Response(serialize_batch(batch, bio_hash))
 
 
 @api_view(["GET"])
 def get_batch(request, number: int):
     batch = get_object_or_404(HNBatch, number=number)
     bio_hash = request.query_params.get("bio_hash")
-    return Response(_serialize_batch(batch, bio_hash))
+    return Response(serialize_batch(batch, bio_hash))
+
+
+@api_view(["GET"])
+def search(request):
+    """Ranked full-text search over stories and overviews.
+
+    `cursor` is the `next_cursor` of the previous page. `type` limits the
+    results to `story` and/or `overview`; `bio_hash` limits overviews to one
+    reader.
+    """
+    q = request.query_params.get("q", "").strip()
+    if not q:
+        return Response({"error": "q is required"}, status=400)
+    try:
+        limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        offset = max(int(request.query_params.get("cursor") or 0), 0)
+    except ValueError:
+        return Response({"error": "cursor and limit must be integers"}, status=400)
+
+    kinds = _csv_param(request, "type") or set(SEARCH_KINDS)
+    unknown = kinds - set(SEARCH_KINDS)
+    if unknown:
+        return Response({"error": f"unknown types: {', '.join(sorted(unknown))}"}, status=400)
+
+    page = search_index(q, limit=limit, offset=offset, kinds=kinds, bio_hash=request.query_params.get("bio_hash"))
+    return Response(
+        {
+            "results": page["results"],
+            "next_cursor": offset + limit if page["has_more"] else None,
+        }
+    )
+
+
+@api_view(["GET"])
+def get_queue_stats(request):
+    """Depth and wait-time metrics per worker queue; `window` is in minutes (default 60)."""
+    try:
+        window = min(max(int(request.query_params.get("window", 60)), 1), 24 * 60)
+    except ValueError:
+        return Response({"error": "window must be an integer"}, status=400)
+    return Response({"window_minutes": window, "queues": queue_stats(window)})
@@ -0,0 +1,146 @@
+"""Compare concurrent job-poller capacity of the WSGI and ASGI deployments.
+
+Starts the app under each server in turn, creates a job to poll, then runs N
+simulated browsers that each poll the job endpoint once per interval, and
+reports achieved request rate, latency percentiles and errors. The sync
+DRF endpoint is polled under WSGI and the async one under ASGI.
+
+    uv run --with gunicorn --with uvicorn python benchmarks/poll_capacity.py \\
+        --pollers 50 200 400 --workers 4 --duration 15
+
+Needs a migrated database (`manage.py migrate`). Servers bind to 127.0.0.1.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    "wsgi": {
+        "cmd": ["gunicorn", "config.wsgi:application", "--workers", "{workers}", "--threads", "{threads}"],
+        "bind": ["--bind", "127.0.0.1:{port}"],
+        "path": "/api/jobs/{job_id}/",
+    },
+    "asgi": {
+        "cmd": ["uvicorn", "config.asgi:application", "--workers", "{workers}", "--log-level", "warning"],
+        "bind": ["--host", "127.0.0.1", "--port", "{port}"],
+        "path": "/api/async/jobs/{job_id}/",
+    },
+}
+
+
+def _create_job():
+    """A RUNNING job to poll; main() deletes it when the run ends."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    sys.path.insert(0, str(ROOT))
+    import django
+
+    django.setup()
+    from api.models import Job
+
+    return Job.objects.create(kind=Job.Kind.FETCH_BATCH, status=Job.Status.RUNNING, message="poll benchmark")
+
+
+def _start_server(kind: str, port: int, workers: int, threads: int) -> subprocess.Popen:
+    spec = SERVERS[kind]
+    args = [
+        part.format(workers=workers, threads=threads, port=port)
+        for part in spec["cmd"] + spec["bind"]
+    ]
+    return subprocess.Popen(args, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def _wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(trust_env=False) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not come up")
+
+
+async def _poller(client: httpx.AsyncClient, url: str, interval: float, stop_at: float, stats: dict) -> None:
+    while time.monotonic() < stop_at:
+        started = time.monotonic()
+        try:
+            resp = await client.get(url)
+            if resp.status_code == 200:
+                stats["latencies"].append(time.monotonic() - started)
+            else:
+                stats["errors"] += 1
+        except httpx.HTTPError:
+            stats["errors"] += 1
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+async def _run_load(url: str, pollers: int, interval: float, duration: float) -> dict:
+    stats: dict = {"latencies": [], "errors": 0}
+    limits = httpx.Limits(max_connections=pollers, max_keepalive_connections=pollers)
+    async with httpx.AsyncClient(limits=limits, timeout=10.0, trust_env=False) as client:
+        stop_at = time.monotonic() + duration
+        await asyncio.gather(*(_poller(client, url, interval, stop_at, stats) for _ in range(pollers)))
+    latencies = sorted(stats["latencies"])
+    pct = (lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000) if latencies else (
+        lambda q: float("nan")
+    )
+    return {
+        "rps": len(latencies) / duration,
+        "target_rps": pollers / interval,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "errors": stats["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=["wsgi", "asgi"])
+    parser.add_argument("--pollers", nargs="+", type=int, default=[50, 200, 400])
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls per browser.")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4, help="Threads per WSGI worker.")
+    parser.add_argument("--port", type=int, default=8901)
+    args = parser.parse_args()
+
+    job = _create_job()
+    try:
+        print(f"{'server':<6} {'pollers':>7} {'rps':>8} {'target':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for kind in args.servers:
+            proc = _start_server(kind, args.port, args.workers, args.threads)
+            try:
+                url = f"http://127.0.0.1:{args.port}" + SERVERS[kind]["path"].format(job_id=job.id)
+                asyncio.run(_wait_ready(url))
+                if proc.poll() is not None:
+                    raise RuntimeError(f"{kind} server exited; is port {args.port} free?")
+                for pollers in args.pollers:
+                    r = asyncio.run(_run_load(url, pollers, args.interval, args.duration))
+                    print(
+                        f"{kind:<6} {pollers:>7} {r['rps']:>8.1f} {r['target_rps']:>8.1f} {r['p50_ms']:>8.1f} "
+                        f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7}"
+                    )
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+    finally:
+        # The servers share the real database; don't leave a live-looking job behind.
+        job.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Time full-text search against a throwaway database seeded with synthetic stories.
+
+Each story gets a title, ~300 words of article text and a summary; the
+indexing triggers run on insert, so seeding also shows the write overhead.
+Query time grows with the number of matching documents, which is printed
+next to each query.
+
+    uv run python benchmarks/search.py --stories 30000 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Filler words follow a Zipf distribution over a 20k-word vocabulary, like real
+# text; each topic word lands in roughly TOPIC_RATE of the documents. "w1" is
+# the most common filler word and shows the worst case: a term in nearly
+# every document, all of which bm25 has to score.
+VOCABULARY = [f"w{rank}" for rank in range(1, 20001)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, 20001)))
+TOPICS = ("rust", "database", "open", "source", "language", "model", "quantum", "computing", "startup")
+TOPIC_RATE = 0.03
+
+QUERIES = ("rust", "database", "open source", "language model", "quantum computing startup", "w1", "zzzz")
+
+
+def _text(rng: random.Random, words: int) -> str:
+    tokens = rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=words)
+    tokens += [topic for topic in TOPICS if rng.random() < TOPIC_RATE]
+    return " ".join(tokens)
+
+
+def _seed(count: int) -> float:
+    from django.db import transaction
+    from django.utils import timezone
+
+    from api.models import HNStory, HNStoryContent, HNStorySummary
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    with transaction.atomic():
+        stories = HNStory.objects.bulk_create(
+            HNStory(hn_id=i + 1, title=_text(rng, 8), url=f"https://example.com/{i}", fetched_at=timezone.now())
+            for i in range(count)
+        )
+        HNStoryContent.objects.bulk_create(
+            HNStoryContent(story=story, extracted_text=_text(rng, 300), word_count=300) for story in stories
+        )
+        HNStorySummary.objects.bulk_create(
+            HNStorySummary(story=story, summary_text=_text(rng, 60)) for story in stories
+        )
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stories", type=int, default=30000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="search-bench-")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = os.path.join(workdir, "bench.sqlite3")
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+    from django.db import connection
+
+    from api.services.search import build_match_query, search
+
+    print(f"seeded {args.stories} stories in {_seed(args.stories):.1f}s ({workdir})")
+    print(f"{'query':<26} {'matches':>8} {'median ms':>10} {'p95 ms':>8} {'page':>5}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            page = search(query, limit=args.limit)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM api_story_fts WHERE api_story_fts MATCH %s", [build_match_query(query)])
+            matches = cursor.fetchone()[0]
+        print(f"{query:<26} {matches:>8} {statistics.median(timings):>10.2f} {p95:>8.2f} {len(page['results']):>5}")
+
+
+if __name__ == "__main__":
+    main()
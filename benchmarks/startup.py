@@ -0,0 +1,69 @@
+"""Report import time and resident memory for the web and worker entry points.
+
+Each entry point is loaded in a fresh interpreter:
+
+- web: Django setup, URLconf and WSGI/ASGI application, i.e. what a web
+  worker loads before serving its first request (including Huey's task
+  autodiscovery).
+- worker: the web set plus the LLM and extraction stack a Huey consumer
+  loads when it starts (see the on_startup hook in api/tasks.py).
+
+    uv run python benchmarks/startup.py --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("langchain_core", "langchain_openai", "langgraph", "openai", "trafilatura", "httpx")
+
+PROBE = """
+import json, os, resource, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+import config.asgi, config.wsgi
+if {worker!r}:
+    from api.tasks import preload_worker_modules
+    preload_worker_modules()
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "heavy": sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+
+def _probe(worker: bool) -> dict:
+    code = PROBE.format(worker=worker, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'entry':<7} {'import ms (median)':>18} {'max RSS MB':>11}  heavy modules loaded")
+    for name, worker in (("web", False), ("worker", True)):
+        runs = [_probe(worker) for _ in range(args.repeat)]
+        seconds = statistics.median(run["seconds"] for run in runs)
+        rss = statistics.median(run["rss_mb"] for run in runs)
+        heavy = ", ".join(runs[-1]["heavy"]) or "-"
+        print(f"{name:<7} {seconds * 1000:>18.0f} {rss:>11.1f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -128,7 +129,111 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Huey background task queue (SQLite-backed)
+# Huey background task queues (SQLite-backed). Each queue is its own Huey
+# instance and file with its own consumer (`manage.py run_queue_workers`);
+# api/tasks.py decides which task goes where.
+# - fetch: HN API calls, article download/extraction (CPU-heavy trafilatura)
+#   and maintenance; process workers sidestep the GIL.
+# - llm: summaries and overviews, which mostly wait on the API; many threads.
 from huey import SqliteHuey  # noqa: E402
 
-HUEY = SqliteHuey("huey", filename=str(BASE_DIR / "huey.db"))
+HUEY_QUEUES = {
+    "fetch": {
+        # Keeps the name of the former single queue: SqliteHuey keys its rows
+        # by name, so tasks already queued in huey.db survive an upgrade.
+        "huey": SqliteHuey("huey", filename=str(BASE_DIR / "huey.db")),
+        "consumer": {
+            "workers": int(os.environ.get("HUEY_FETCH_WORKERS", "2")),
+            "worker_type": os.environ.get("HUEY_FETCH_WORKER_TYPE", "process"),
+            # Clear task locks left behind by a worker that was killed holding one.
+            "flush_locks": True,
+        },
+    },
+    "llm": {
+        "huey": SqliteHuey("llm", filename=str(BASE_DIR / "huey-llm.db")),
+        "consumer": {
+            "workers": int(os.environ.get("HUEY_LLM_WORKERS", "16")),
+            "worker_type": os.environ.get("HUEY_LLM_WORKER_TYPE", "thread"),
+        },
+    },
+}
+
+# djhuey's default instance: plain `run_huey` only consumes the fetch queue.
+HUEY = HUEY_QUEUES["fetch"]["huey"]
+
+# How long a user fetch waits before retrying while another fetch holds the lock.
+FETCH_LOCK_RETRY_SECONDS = int(os.environ.get("FETCH_LOCK_RETRY_SECONDS", "10"))
+
+# Huey priorities (higher runs first): interactive work before background warming.
+JOB_PRIORITIES = {
+    "ANALYZE_BATCH": 100,
+    "FETCH_BATCH": 50,
+    "OVERVIEW_FANOUT": 20,
+    "PREWARM": 10,
+}
+
+# A queued/running job whose row has not changed for this long is treated as
+# abandoned (killed worker, task never enqueued): it stops holding off
+# pre-warming, and retention marks it ERROR.
+JOB_STALE_MINUTES = int(os.environ.get("JOB_STALE_MINUTES", "60"))
+
+# Analyze jobs are retried by Huey under the same job id; the summary graph is
+# checkpointed per job in this SQLite file so a retry resumes where it stopped.
+ANALYZE_RETRIES = int(os.environ.get("ANALYZE_RETRIES", "2"))
+ANALYZE_RETRY_DELAY_SECONDS = int(os.environ.get("ANALYZE_RETRY_DELAY_SECONDS", "30"))
+LANGGRAPH_CHECKPOINT_DB = os.environ.get("LANGGRAPH_CHECKPOINT_DB", str(BASE_DIR / "checkpoints.db"))
+# An analyze job that finds another job generating the batch's summaries
+# re-checks this often instead of generating them a second time.
+SUMMARY_CLAIM_RETRY_SECONDS = int(os.environ.get("SUMMARY_CLAIM_RETRY_SECONDS", "5"))
+
+# Hacker News API and the local item mirror (`manage.py sync_hn_mirror`).
+# Point HN_API_BASE_URL at a local fake Firebase server for testing.
+HN_API_BASE_URL = os.environ.get("HN_API_BASE_URL", "https://hacker-news.firebaseio.com/v0")
+HN_FETCH_CONCURRENCY = int(os.environ.get("HN_FETCH_CONCURRENCY", "10"))
+HN_TOP_CANDIDATES = int(os.environ.get("HN_TOP_CANDIDATES", "30"))
+HN_MIRROR_ITEM_MAX_AGE_SECONDS = int(os.environ.get("HN_MIRROR_ITEM_MAX_AGE_SECONDS", "900"))
+HN_MIRROR_TOP_MAX_AGE_SECONDS = int(os.environ.get("HN_MIRROR_TOP_MAX_AGE_SECONDS", "120"))
+HN_MIRROR_NEW_ITEM_LIMIT = int(os.environ.get("HN_MIRROR_NEW_ITEM_LIMIT", "200"))
+HN_MIRROR_RETENTION_DAYS = int(os.environ.get("HN_MIRROR_RETENTION_DAYS", "3"))
+HN_MIRROR_SYNC_ENABLED = os.environ.get("HN_MIRROR_SYNC_ENABLED", "1") == "1"
+HN_MIRROR_SYNC_SCHEDULE = {"minute": "*"}
+
+# Article downloads: non-HTML responses and declared sizes over the limit are
+# skipped before the body is read; HTML bodies are cut off at ARTICLE_MAX_BYTES.
+ARTICLE_MAX_BYTES = int(os.environ.get("ARTICLE_MAX_BYTES", str(2 * 1024 * 1024)))
+ARTICLE_MAX_CONTENT_LENGTH = int(os.environ.get("ARTICLE_MAX_CONTENT_LENGTH", str(20 * 1024 * 1024)))
+ARTICLE_TIMEOUT_SECONDS = float(os.environ.get("ARTICLE_TIMEOUT_SECONDS", "10"))
+# Overall cap per download; ARTICLE_TIMEOUT_SECONDS applies to each read.
+ARTICLE_DEADLINE_SECONDS = float(os.environ.get("ARTICLE_DEADLINE_SECONDS", "30"))
+
+# Canonical story contents are re-extracted once older than this.
+STORY_CONTENT_MAX_AGE_HOURS = int(os.environ.get("STORY_CONTENT_MAX_AGE_HOURS", "24"))
+
+# Pre-warming: a periodic task fetches a new batch when the top list has
+# changed and generates its (bio-agnostic) summaries before users ask.
+PREWARM_ENABLED = os.environ.get("PREWARM_ENABLED", "0") == "1"
+PREWARM_SCHEDULE = {"minute": os.environ.get("PREWARM_CRON_MINUTE", "*/30")}
+PREWARM_MIN_NEW_STORIES = int(os.environ.get("PREWARM_MIN_NEW_STORIES", "3"))
+PREWARM_MAX_BATCH_AGE_MINUTES = int(os.environ.get("PREWARM_MAX_BATCH_AGE_MINUTES", "180"))
+PREWARM_SUMMARY_CONCURRENCY = int(os.environ.get("PREWARM_SUMMARY_CONCURRENCY", "3"))
+
+# Reader profiles: once a batch's summaries exist, overviews are generated
+# for recently active profiles so their next visit is already warm.
+PROFILE_ACTIVE_DAYS = int(os.environ.get("PROFILE_ACTIVE_DAYS", "14"))
+PROFILE_FANOUT_LIMIT = int(os.environ.get("PROFILE_FANOUT_LIMIT", "100"))
+PROFILE_FANOUT_CONCURRENCY = int(os.environ.get("PROFILE_FANOUT_CONCURRENCY", "3"))
+
+# Bios are normalized before hashing. An overview already written for a bio
+# whose estimated (MinHash) similarity reaches this threshold is reused
+# instead of generating a new one; above 1 disables near-duplicate reuse.
+BIO_REUSE_THRESHOLD = float(os.environ.get("BIO_REUSE_THRESHOLD", "0.8"))
+
+# Retention: pruning of old batches/jobs and SQLite compaction.
+# Run via `manage.py prune_history` or the daily Huey periodic task.
+RETENTION_KEEP_BATCHES = int(os.environ.get("RETENTION_KEEP_BATCHES", "50"))
+RETENTION_JOB_DAYS = int(os.environ.get("RETENTION_JOB_DAYS", "14"))
+RETENTION_BATCH_CHUNK_SIZE = int(os.environ.get("RETENTION_BATCH_CHUNK_SIZE", "10"))
+RETENTION_JOB_CHUNK_SIZE = int(os.environ.get("RETENTION_JOB_CHUNK_SIZE", "500"))
+RETENTION_VACUUM_MIN_FREE_RATIO = float(os.environ.get("RETENTION_VACUUM_MIN_FREE_RATIO", "0.2"))
+RETENTION_PERIODIC_ENABLED = os.environ.get("RETENTION_PERIODIC_ENABLED", "1") == "1"
+RETENTION_SCHEDULE = {"hour": "3", "minute": "15"}